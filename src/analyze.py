@@ -1,18 +1,31 @@
 import argparse
+import asyncio
+import hashlib
 import os
 import json
 import logging
+import queue
+import random
+from collections import defaultdict, deque
+from pathlib import Path
+from types import SimpleNamespace
 from typing import Optional
+import threading
 import time
 
-from rich.console import Console
+from rich.console import Console, Group
+from rich.live import Live
+from rich.markup import escape
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn, TimeRemainingColumn
+from rich.text import Text
 from dotenv import load_dotenv
+import httpx
 from sqlite_utils import Database
 from google import genai
 from google.genai import types
+from google.genai import errors as genai_errors
 
-from src.schema import VideoAnalysis, get_schema_json
+from src.schema import get_response_schema, get_schema_json, parse_analysis
 from src.prompts import SYSTEM_INSTRUCTION_V1
 
 # Log config - File only to prevent interference with Rich Live display
@@ -46,49 +59,299 @@ PRICE_PER_MILLION = {
 # CHANGE THIS TO SWITCH MODELS
 CURRENT_MODEL = MODEL_PREVIEW
 
+# Exact-match cache of Gemini responses, one JSON file per request
+RESPONSE_CACHE_DIR = Path("data/response_cache")
+
 def get_db():
-    return Database(DB_FILE)
+    db = Database(DB_FILE)
+    # WAL is persisted in the file, so switch once here, before any reads are
+    # in flight; worker connections then inherit it.
+    db.conn.execute("PRAGMA journal_mode=WAL")
+    return db
 
-def construct_prompt(title: str, video_url: str) -> str:
-    return f"""
-    Title: {title}
-    URL: {video_url}
-    
-    Analyze the video based on the system instructions.
+# Transient API failures (rate limits, overloaded backend) are retried in place
+# instead of marking the row as ERROR
+RETRY_ATTEMPTS = 5
+RETRYABLE_CODES = {429, 500, 503}
+RETRY_MAX_DELAY = 30  # seconds
+
+ID_CHUNK_SIZE = 500  # keeps IN (...) lists well under SQLite's bound-parameter limit
+
+def query_ids(db, select: str, video_ids, where: Optional[str] = None):
+    """
+    Runs `select` restricted to `video_ids` (and the optional extra `where`
+    clause), issuing one IN (...) query per ID_CHUNK_SIZE ids, and lazily
+    yields the rows as dicts.
+    """
+    extra = f"({where}) AND " if where else ""
+    for start in range(0, len(video_ids), ID_CHUNK_SIZE):
+        chunk = video_ids[start:start + ID_CHUNK_SIZE]
+        cursor = db.conn.execute(f"{select} WHERE {extra}video_id IN ({','.join('?' * len(chunk))})", chunk)
+        columns = [d[0] for d in cursor.description]
+        for row in cursor:
+            yield dict(zip(columns, row))
+
+# Results are written by a single thread in batched transactions
+WRITE_BATCH_SIZE = 50
+WRITE_BATCH_TIMEOUT = 0.2  # seconds to wait for a batch to fill up
+_STOP_WRITER = object()
+
+def apply_updates(db, batch):
+    """Applies (video_id, updates) pairs in one transaction, one executemany per column set."""
+    by_cols = defaultdict(list)
+    for video_id, updates in batch:
+        cols = tuple(updates)
+        by_cols[cols].append([updates[c] for c in cols] + [video_id])
+
+    with db.conn:
+        for cols, params in by_cols.items():
+            assignments = ", ".join(f"[{c}] = ?" for c in cols)
+            db.conn.executemany(f"UPDATE videos SET {assignments} WHERE video_id = ?", params)
+
+def write_results(results_q):
+    """
+    Writer thread: drains (video_id, updates) tuples from the queue until the
+    sentinel arrives, committing up to WRITE_BATCH_SIZE rows per transaction.
     """
+    db = Database(DB_FILE)
+    db.conn.execute("PRAGMA synchronous=NORMAL")
+
+    stopping = False
+    while not stopping:
+        batch = [results_q.get()]
+        deadline = time.monotonic() + WRITE_BATCH_TIMEOUT
+        # The sentinel is the last item ever queued, so it ends the batch at once
+        while len(batch) < WRITE_BATCH_SIZE and batch[-1] is not _STOP_WRITER:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(results_q.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        if batch[-1] is _STOP_WRITER:
+            stopping = True
+            batch.pop()
+        if not batch:
+            continue
+
+        try:
+            apply_updates(db, batch)
+        except Exception as e:
+            # One bad row shouldn't drop the rest of the batch: retry row by row
+            logging.error(f"Failed to write batch of {len(batch)} results, retrying individually: {e}")
+            for video_id, updates in batch:
+                try:
+                    apply_updates(db, [(video_id, updates)])
+                except Exception as e:
+                    logging.error(f"Failed to write result for {video_id}: {e}")
+
+VERDICT_COLORS = {
+    "Approve": "green",
+    "Monitor": "yellow",
+    "Block_Video": "red",
+    "Block_Channel": "red",
+    "Error": "red"
+}
 
-def analyze_video(client, video_id: str, title: str, model_name: str = CURRENT_MODEL):
+RECENT_ROWS = 16  # completed videos kept on screen
+def _fmt_title(title: str) -> str:
+    """Truncates/pads a title to the 35-char Title column."""
+    return (title[:32] + "...") if len(title) > 35 else title.ljust(35)
+
+RESULTS_HEADER = f"[bold white]{'Video ID':<12} | {'Title':<35} | {'Verdict':<15} | {'Tokens':<12} | {'Cost':<10}[/bold white]"
+
+class RecentResults:
     """
-    Calls Gemini API to analyze the video.
+    Rolling log of the last completed rows. Workers only append under the
+    lock; the Live refresh thread renders it at a fixed rate.
     """
-    
-    video_url = f"https://www.youtube.com/watch?v={video_id}"
-    prompt = construct_prompt(title, video_url)
+    def __init__(self, maxlen=RECENT_ROWS):
+        self.lock = threading.Lock()
+        self.rows = deque(maxlen=maxlen)
+
+    def add(self, line):
+        with self.lock:
+            self.rows.append(line)
+
+    def __rich__(self):
+        with self.lock:
+            lines = list(self.rows)
+        return Group(
+            Text.from_markup(RESULTS_HEADER),
+            Text.from_markup("[dim]" + "-"*95 + "[/dim]"),
+            *(Text.from_markup(line) for line in lines)
+        )
+
+_PROMPT_TMPL = (
+    "Title: {title}\n"
+    "URL: https://www.youtube.com/watch?v={video_id}\n"
+    "\n"
+    "Analyze the video based on the system instructions."
+)
 
+def make_client(api_key: str, max_workers: int):
+    """
+    Creates a genai.Client whose HTTP connection pool is sized to the number
+    of concurrent workers, so requests don't queue behind httpx's defaults.
+    """
+    limits = httpx.Limits(max_connections=max_workers * 2, max_keepalive_connections=max_workers * 2)
+    http_options = types.HttpOptions(
+        client_args={"limits": limits},
+        async_client_args={"limits": limits}
+    )
+    return genai.Client(api_key=api_key, http_options=http_options)
+
+def construct_prompt(title: str, video_id: str) -> str:
+    return _PROMPT_TMPL.format(title=title, video_id=video_id)
+
+def _cache_file(model: str, prompt: str, system_instruction: Optional[str], schema) -> Path:
+    key_parts = [model, system_instruction or "", get_schema_json() if schema else "", prompt]
+    key = hashlib.sha256("\0".join(key_parts).encode()).hexdigest()
+    return RESPONSE_CACHE_DIR / f"{key}.json"
+
+def _is_cacheable(response, schema) -> bool:
+    """Only non-empty replies are cached, and schema replies only if their text is valid JSON."""
+    if not (response and response.text):
+        return False
+    if schema:
+        try:
+            json.loads(response.text)
+        except ValueError:
+            return False
+    return True
+
+def _read_cache(cache_file: Path, schema):
+    if not cache_file.exists():
+        return None
     try:
-        response = client.models.generate_content(
-            model=model_name,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=SYSTEM_INSTRUCTION_V1,
-                response_mime_type="application/json",
-                response_schema=VideoAnalysis
-            )
+        cached = json.loads(cache_file.read_text())
+        response = SimpleNamespace(
+            text=cached["text"],
+            usage_metadata=SimpleNamespace(**cached["usage_metadata"])
         )
-        
-        return response
-    except Exception as e:
-        logging.error(f"Gemini Analysis Failed: {e}")
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.warning(f"Ignoring unreadable cache entry {cache_file}: {e}")
+        return None
+    if not _is_cacheable(response, schema):
+        logging.warning(f"Ignoring malformed cached response {cache_file}")
         return None
+    return response
 
+def _write_cache(cache_file: Path, model: str, response, schema):
+    if not _is_cacheable(response, schema):
+        return
+    usage = response.usage_metadata
+    try:
+        payload = json.dumps({
+            "text": response.text,
+            "usage_metadata": {
+                "prompt_token_count": usage.prompt_token_count if usage else 0,
+                "candidates_token_count": usage.candidates_token_count if usage else 0,
+            }
+        })
+        # Write-then-rename so concurrent workers never read a partial file
+        RESPONSE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_file.write_text(payload)
+        os.replace(tmp_file, cache_file)
+    except (OSError, TypeError) as e:
+        logging.warning(f"Could not cache response for {model}: {e}")
+
+def _generate_config(system_instruction: Optional[str], schema):
+    if not (system_instruction or schema):
+        return None
+    return types.GenerateContentConfig(
+        system_instruction=system_instruction,
+        response_mime_type="application/json" if schema else None,
+        response_schema=schema
+    )
+
+def _retry_delay(model: str, error, attempt: int) -> Optional[float]:
+    """Backoff before the next attempt, or None if the error should propagate."""
+    if error.code not in RETRYABLE_CODES or attempt == RETRY_ATTEMPTS - 1:
+        return None
+    delay = min(2 ** attempt + random.random(), RETRY_MAX_DELAY)
+    logging.warning(f"{model} returned {error.code}, retrying in {delay:.1f}s")
+    return delay
 
+def cached_generate(client, model: str, prompt: str, system_instruction: Optional[str] = None, schema=None, use_cache: bool = True):
+    """
+    Calls client.models.generate_content, serving repeats of the same
+    (model, system instruction, schema, prompt) from RESPONSE_CACHE_DIR.
+    Cache hits return a namespace with the same `text` and `usage_metadata`
+    token counts as the original response. Replies that don't parse are
+    never cached; use_cache=False skips the lookup but still refreshes the entry.
+    """
+    cache_file = _cache_file(model, prompt, system_instruction, schema)
+    cached = _read_cache(cache_file, schema) if use_cache else None
+    if cached:
+        return cached
+
+    config = _generate_config(system_instruction, schema)
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            response = client.models.generate_content(model=model, contents=prompt, config=config)
+            break
+        except genai_errors.APIError as e:
+            delay = _retry_delay(model, e, attempt)
+            if delay is None:
+                raise
+            time.sleep(delay)
+
+    _write_cache(cache_file, model, response, schema)
+    return response
+
+async def cached_generate_async(client, model: str, prompt: str, system_instruction: Optional[str] = None, schema=None, use_cache: bool = True):
+    """
+    Same as cached_generate, but awaits client.aio so many requests can be in
+    flight on one event loop.
+    """
+    cache_file = _cache_file(model, prompt, system_instruction, schema)
+    # Cache file I/O runs in a thread so it doesn't stall the other workers
+    cached = await asyncio.to_thread(_read_cache, cache_file, schema) if use_cache else None
+    if cached:
+        return cached
+
+    config = _generate_config(system_instruction, schema)
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            response = await client.aio.models.generate_content(model=model, contents=prompt, config=config)
+            break
+        except genai_errors.APIError as e:
+            delay = _retry_delay(model, e, attempt)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+
+    await asyncio.to_thread(_write_cache, cache_file, model, response, schema)
+    return response
+
+def analyze_video(client, video_id: str, title: str, model_name: str = CURRENT_MODEL, use_cache: bool = True):
+    """
+    Calls Gemini API to analyze the video. use_cache=False always queries the
+    API (refreshing the cached reply).
+    """
+    prompt = construct_prompt(title, video_id)
 
-# ... (imports remain)
+    try:
+        return cached_generate(client, model_name, prompt, SYSTEM_INSTRUCTION_V1, schema=get_response_schema(), use_cache=use_cache)
+    except Exception as e:
+        logging.error(f"Gemini Analysis Failed: {e}")
+        return None
 
-import concurrent.futures
-import threading
+async def analyze_video_async(client, video_id: str, title: str, model_name: str = CURRENT_MODEL, use_cache: bool = True):
+    """
+    Async version of analyze_video, used by the main analysis loop.
+    """
+    prompt = construct_prompt(title, video_id)
 
-# ... (imports remain)
+    try:
+        return await cached_generate_async(client, model_name, prompt, SYSTEM_INSTRUCTION_V1, schema=get_response_schema(), use_cache=use_cache)
+    except Exception as e:
+        logging.error(f"Gemini Analysis Failed: {e}")
+        return None
 
 def main():
     parser = argparse.ArgumentParser(description="SlopStopper Analysis")
@@ -96,6 +359,8 @@ def main():
     parser.add_argument("--all", action="store_true", help="Analyze all PENDING videos")
     parser.add_argument("--limit", type=int, help="Analyze the first N pending videos")
     parser.add_argument("--workers", type=int, default=5, help="Number of concurrent workers (1-20)")
+    parser.add_argument("--force", action="store_true", help="With --ids, re-analyze videos that are already ANALYZED")
+    parser.add_argument("--validate", action="store_true", help="Validate each response against the full Pydantic schema (slower, for debugging)")
     args = parser.parse_args()
 
     # Cap workers at 20
@@ -108,86 +373,90 @@ def main():
 
     db = get_db()
     
+    # Rows are streamed lazily from SQLite; only the count is needed up front.
     if args.ids:
-        rows = list(db["videos"].rows_where(f"video_id in ({','.join(['?']*len(args.ids))})", args.ids))
+        video_ids = list(dict.fromkeys(args.ids))
+        # Already-analyzed rows are skipped unless --force: the DB is the cache
+        where = None if args.force else "status != 'ANALYZED'"
+        total = sum(r["n"] for r in query_ids(db, "SELECT count(*) AS n FROM videos", video_ids, where))
+        skipped = sum(r["n"] for r in query_ids(db, "SELECT count(*) AS n FROM videos", video_ids)) - total
+        if skipped:
+            console.print(f"[yellow]Skipping {skipped} already analyzed video(s); use --force to re-analyze.[/yellow]")
+        rows = query_ids(db, "SELECT video_id, title FROM videos", video_ids, where)
     elif args.limit:
-        rows = list(db["videos"].rows_where("status = 'PENDING'", limit=args.limit))
+        rows = db["videos"].rows_where("status = 'PENDING'", select="video_id, title", limit=args.limit)
+        total = min(args.limit, db["videos"].count_where("status = 'PENDING'"))
     elif args.all:
-        rows = list(db["videos"].rows_where("status = 'PENDING'"))
+        rows = db["videos"].rows_where("status = 'PENDING'", select="video_id, title")
+        total = db["videos"].count_where("status = 'PENDING'")
     else:
         console.print("Please specify --ids, --limit, or --all")
         return
 
-    # Sharing Client? Google GenAI Client is thread-safe usually.
-    # We will instantiate inside main.
+    # One client shared by all workers
     client = None
     if GEMINI_API_KEY:
-        client = genai.Client(api_key=GEMINI_API_KEY)
+        client = make_client(GEMINI_API_KEY, max_workers)
 
-    # Shared State & Locks
+    # Running totals. Only the event loop thread touches these, so no lock.
     state = {
         "cost": 0.0,
         "in": 0,
         "out": 0,
         "processed": 0
     }
-    lock = threading.Lock()
+    results_q = queue.Queue()
 
     # Helper to calculate cost
     def calc_cost(in_tok, out_tok, model):
         price = PRICE_PER_MILLION.get(model, 0.0)
         return ((in_tok + out_tok) / 1_000_000) * price
 
-    # Setup Progress Bar with Rolling Log
-    with Progress(
+    # Setup Progress Bar with Rolling Log. Workers only mutate shared state;
+    # a single Live loop redraws both at a fixed rate.
+    progress = Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         BarColumn(),
         TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
         TimeElapsedColumn(),
         TimeRemainingColumn(),
-        console=console
-    ) as progress:
-        
-        task_id = progress.add_task(f"[cyan]Initializing ({max_workers} workers)...", total=len(rows))
+        console=console,
+        auto_refresh=False
+    )
+    recent = RecentResults()
+
+    with Live(Group(recent, progress), console=console, refresh_per_second=4):
         
-        # Print Header
-        progress.console.print(f"[bold white]{'Video ID':<12} | {'Title':<35} | {'Verdict':<15} | {'Tokens':<12} | {'Cost':<10}[/bold white]")
-        progress.console.print("[dim]" + "-"*95 + "[/dim]")
+        task_id = progress.add_task(f"[cyan]Initializing ({max_workers} workers)...", total=total)
         
-        def process_single_video(row):
+        async def process_single_video(row):
             video_id = row['video_id']
             title = row['title']
             
             # MOCK LOGIC
             if os.getenv("MOCK_GEMINI"):
-                time.sleep(0.5) 
+                await asyncio.sleep(0.5)
                 action = "Approve"
                 in_tok, out_tok = 100, 50
                 cost = calc_cost(in_tok, out_tok, CURRENT_MODEL)
                 
-                with lock:
-                    state["in"] += in_tok
-                    state["out"] += out_tok
-                    state["cost"] += cost
-                    state["processed"] += 1
-                    current_cost = state["cost"]
+                state["in"] += in_tok
+                state["out"] += out_tok
+                state["cost"] += cost
+                state["processed"] += 1
                 
-                # UI Update (Thread safe via rich)
-                # Helper to print row
+                # Log row for the next redraw
                 vid_s = video_id[:12]
-                tit_s = (title[:32] + "...") if len(title) > 35 else title
-                tit_s = tit_s.ljust(35)
+                tit_s = escape(_fmt_title(title))
                 # Colorize Verdict
-                if "Block" in action or "Error" in action: v_col = "red"
-                elif "Monitor" in action: v_col = "yellow"
-                else: v_col = "green"
+                v_col = VERDICT_COLORS.get(action, "green")
                 verdict_s = f"[{v_col}]{action:<15}[/{v_col}]"
                 tok_s = f"{in_tok}/{out_tok}"
                 cost_s = f"${cost:.6f}"
-                progress.console.print(f"{vid_s:<12} | {tit_s} | {verdict_s} | {tok_s:<12} | {cost_s:<10}")
+                recent.add(f"{vid_s:<12} | {tit_s} | {verdict_s} | {tok_s:<12} | {cost_s:<10}")
 
-                progress.update(task_id, advance=1, description=f"[cyan]Analyzing ({max_workers} threads)... Cost: ${current_cost:.4f}")
+                progress.update(task_id, advance=1, description=f"[cyan]Analyzing ({max_workers} workers)... Cost: ${state['cost']:.4f}")
                 return
 
             if not client:
@@ -195,9 +464,9 @@ def main():
                  return
 
             # REAL API CALL
-            # Note: client usage might need catching if not thread safe, but standard clients usually are.
             try:
-                response = analyze_video(client, video_id, title)
+                # --force re-queries Gemini instead of replaying the response cache
+                response = await analyze_video_async(client, video_id, title, use_cache=not args.force)
             except Exception as e:
                 # Fallback error catch
                 response = None
@@ -205,66 +474,77 @@ def main():
 
             if response and response.text:
                 try:
-                    analysis_data = VideoAnalysis.model_validate_json(response.text)
+                    # Gemini already enforces response_schema, so only the fields
+                    # below are read; full validation is opt-in.
+                    if args.validate:
+                        parse_analysis(response.text)
+                    analysis = json.loads(response.text)
                     
                     in_tok = response.usage_metadata.prompt_token_count if response.usage_metadata else 0
                     out_tok = response.usage_metadata.candidates_token_count if response.usage_metadata else 0
                     cost = calc_cost(in_tok, out_tok, CURRENT_MODEL)
                     
-                    with lock:
-                        state["in"] += in_tok
-                        state["out"] += out_tok
-                        state["cost"] += cost
-                        current_cost = state["cost"]
-
-                    # Update DB (Thread-Local Connection)
-                    thread_db = Database(DB_FILE)
-                    thread_db["videos"].update(video_id, {
+                    state["in"] += in_tok
+                    state["out"] += out_tok
+                    state["cost"] += cost
+
+                    # Queue DB update for the writer thread
+                    results_q.put((video_id, {
                         "status": "ANALYZED",
-                        "analysis_json": response.text,
-                        "safety_score": analysis_data.risk_assessment.safety_score,
-                        "primary_genre": analysis_data.content_taxonomy.primary_genre.value,
-                        "is_slop": analysis_data.cognitive_nutrition.is_slop,
-                        "is_brainrot": analysis_data.cognitive_nutrition.is_brainrot,
-                        "is_short": analysis_data.video_metadata.format == "Short_Vertical",
+                        # Re-serialized compactly: no indentation, raw UTF-8
+                        "analysis_json": json.dumps(analysis, separators=(",", ":"), ensure_ascii=False),
+                        "safety_score": analysis["risk_assessment"]["safety_score"],
+                        "primary_genre": analysis["content_taxonomy"]["primary_genre"],
+                        "is_slop": analysis["cognitive_nutrition"]["is_slop"],
+                        "is_brainrot": analysis["cognitive_nutrition"]["is_brainrot"],
+                        "is_short": analysis["video_metadata"]["format"] == "Short_Vertical",
                         "model_used": CURRENT_MODEL,
                         "input_tokens": in_tok,
                         "output_tokens": out_tok,
                         "estimated_cost": cost,
-                    })
+                    }))
                     
-                    # Print Row
-                    action = analysis_data.verdict.action.value
+                    # Log Row
+                    action = analysis["verdict"]["action"]
                     vid_s = video_id[:12]
-                    tit_s = (title[:32] + "...") if len(title) > 35 else title
-                    tit_s = tit_s.ljust(35)
-                    if "Block" in action or "Error" in action: v_col = "red"
-                    elif "Monitor" in action: v_col = "yellow"
-                    else: v_col = "green"
+                    tit_s = escape(_fmt_title(title))
+                    v_col = VERDICT_COLORS.get(action, "green")
                     verdict_s = f"[{v_col}]{action:<15}[/{v_col}]"
-                    progress.console.print(f"{vid_s:<12} | {tit_s} | {verdict_s} | {in_tok}/{out_tok:<12} | ${cost:.6f}")
+                    recent.add(f"{vid_s:<12} | {tit_s} | {verdict_s} | {in_tok}/{out_tok:<12} | ${cost:.6f}")
                     
                 except Exception as e:
                     logging.error(f"Failed to process response for {video_id}: {e}")
-                    thread_db = Database(DB_FILE)
-                    thread_db["videos"].update(video_id, {"status": "ERROR", "error_log": str(e)})
-                    progress.console.print(f"{video_id[:12]} | {title[:20]:<35} | [red]Error[/red]           | 0/0          | $0.000000")
+                    results_q.put((video_id, {"status": "ERROR", "error_log": str(e)}))
+                    recent.add(f"{video_id[:12]} | {escape(f'{title[:20]:<35}')} | [red]Error[/red]           | 0/0          | $0.000000")
             else:
-                 thread_db = Database(DB_FILE)
-                 thread_db["videos"].update(video_id, {"status": "ERROR", "error_log": "No response from Gemini"})
-                 progress.console.print(f"{video_id[:12]} | {title[:20]:<35} | [red]No Resp[/red]         | 0/0          | $0.000000")
+                 results_q.put((video_id, {"status": "ERROR", "error_log": "No response from Gemini"}))
+                 recent.add(f"{video_id[:12]} | {escape(f'{title[:20]:<35}')} | [red]No Resp[/red]         | 0/0          | $0.000000")
 
-            with lock:
-                state["processed"] += 1
-                current_cost = state["cost"]
-                
-            progress.update(task_id, advance=1, description=f"[cyan]Analyzing ({max_workers} threads)... Cost: ${current_cost:.4f}")
+            state["processed"] += 1
+            progress.update(task_id, advance=1, description=f"[cyan]Analyzing ({max_workers} workers)... Cost: ${state['cost']:.4f}")
 
-        # Execute Concurrently
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            futures = [executor.submit(process_single_video, row) for row in rows]
-            concurrent.futures.wait(futures)
+        # max_workers coroutines pull from the shared row iterator, so at most
+        # that many requests are in flight and rows are read as they free up.
+        async def worker():
+            for row in rows:
+                try:
+                    await process_single_video(row)
+                except Exception as e:
+                    logging.error(f"Worker task failed: {e}")
+
+        async def run_workers():
+            await asyncio.gather(*(worker() for _ in range(max_workers)))
+
+        # Writes still go through the batching writer thread; results_q.put
+        # never blocks, so it is safe to call from the event loop.
+        writer = threading.Thread(target=write_results, args=(results_q,), daemon=True)
+        writer.start()
+        try:
+            asyncio.run(run_workers())
+        finally:
+            # Results already queued are paid for: flush them even on Ctrl-C
+            results_q.put(_STOP_WRITER)
+            writer.join()
 
     console.print(f"[bold green]Analysis Complete. Total Estimated Cost: ${state['cost']:.6f}[/bold green]")
 
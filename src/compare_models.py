@@ -1,15 +1,14 @@
 import argparse
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from rich.console import Console
 from rich.panel import Panel
 from rich.markdown import Markdown
 from dotenv import load_dotenv
 from google import genai
-from google.genai import types
 
-from src.analyze import get_db, construct_prompt, analyze_video, MODEL_DEFAULT, MODEL_PREVIEW
-from src.schema import VideoAnalysis
+from src.analyze import get_db, construct_prompt, analyze_video, cached_generate, MODEL_DEFAULT, MODEL_PREVIEW
 from src.prompts import SYSTEM_INSTRUCTION_V1
 
 # Log config
@@ -39,12 +38,11 @@ def main():
         return
     
     title = rows[0]["title"]
-    video_url = f"https://www.youtube.com/watch?v={args.video_id}"
     
     console.print(f"[bold cyan]Comparing Models for:[/bold cyan] {title} ({args.video_id})")
     
     # Construct Prompt
-    prompt_text = construct_prompt(title, video_url)
+    prompt_text = construct_prompt(title, args.video_id)
     console.print(Panel(prompt_text, title="Prompt Used", border_style="blue"))
     
     client = None
@@ -63,13 +61,15 @@ def main():
 
     if client:
         with console.status("Running Models..."):
-            # Run Model A
-            resp_a = analyze_video(client, args.video_id, title, model_name=inputs["A"]["model"])
-            inputs["A"]["response"] = resp_a.text if resp_a else "Error"
-
-            # Run Model B
-            resp_b = analyze_video(client, args.video_id, title, model_name=inputs["B"]["model"])
-            inputs["B"]["response"] = resp_b.text if resp_b else "Error"
+            # Run Model A and Model B in parallel (both calls are pure network wait)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = {
+                    key: executor.submit(analyze_video, client, args.video_id, title, model_name=data["model"])
+                    for key, data in inputs.items()
+                }
+                for key, future in futures.items():
+                    resp = future.result()
+                    inputs[key]["response"] = resp.text if resp else "Error"
     elif os.getenv("MOCK_GEMINI"):
         inputs["A"]["response"] = resp_a_text
         inputs["B"]["response"] = resp_b_text
@@ -105,19 +105,13 @@ def main():
         try:
             # Try requested model, distinct catch for fallback? 
             # Or just use the requested one.
-            response = client.models.generate_content(
-                model=MODEL_JUDGE_REQUESTED,
-                contents=judge_prompt
-            )
+            response = cached_generate(client, MODEL_JUDGE_REQUESTED, judge_prompt)
             console.print(Markdown(response.text))
         except Exception as e:
             console.print(f"[red]Judge ({MODEL_JUDGE_REQUESTED}) failed: {e}[/red]")
             console.print("[yellow]Falling back to gemini-1.5-pro...[/yellow]")
             try:
-                response = client.models.generate_content(
-                    model="gemini-1.5-pro",
-                    contents=judge_prompt
-                )
+                response = cached_generate(client, "gemini-1.5-pro", judge_prompt)
                 console.print(Markdown(response.text))
             except Exception as e2:
                 console.print(f"[red]Fallback Judge failed: {e2}[/red]")
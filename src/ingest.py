@@ -4,14 +4,43 @@ from pathlib import Path
 from datetime import datetime
 from sqlite_utils import Database
 
+from src.schema import RiskFlag
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 HISTORY_FILE = Path("data/watch-history.json") # Updated to point to the file in root
 DB_FILE = Path("data/slopstopper.db")
+READ_CHUNK_SIZE = 1 << 16  # characters read from the history file at a time
+INSERT_BATCH_SIZE = 1000
+
+def tune_connection(db):
+    """
+    WAL lets the dashboard keep reading while ingest/analysis write; it is
+    persisted in the file. The remaining PRAGMAs are per connection.
+    """
+    db.enable_wal()
+    db.conn.execute("PRAGMA synchronous=NORMAL")
+    db.conn.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+    db.conn.execute("PRAGMA temp_store=MEMORY")
+    db.conn.execute("PRAGMA cache_size=-65536")  # 64 MiB
+    return db
+
+# Analysis fields without a real column, exposed to SQL as virtual generated
+# columns so the dashboard/ad-hoc queries can filter without parsing JSON
+GENERATED_COLUMNS = {
+    "weirdness_verdict": "TEXT GENERATED ALWAYS AS (json_extract(analysis_json, '$.narrative_quality.weirdness_verdict')) VIRTUAL",
+    "emotional_volatility": "TEXT GENERATED ALWAYS AS (json_extract(analysis_json, '$.cognitive_nutrition.emotional_volatility')) VIRTUAL",
+    # The risk flag booleans (json_extract gives 0/1) packed as RiskFlag bits,
+    # e.g. `WHERE risk_flags & 128` for mascot horror
+    "risk_flags": "INTEGER GENERATED ALWAYS AS ({}) VIRTUAL".format(" | ".join(
+        f"(json_extract(analysis_json, '$.risk_assessment.flags.{flag.name.lower()}') << {flag.value.bit_length() - 1})"
+        for flag in RiskFlag
+    )),
+}
 
 def init_db():
-    db = Database(DB_FILE)
+    db = tune_connection(Database(DB_FILE))
     videos = db["videos"]
     if not videos.exists():
         videos.create({
@@ -36,6 +65,16 @@ def init_db():
             "analysis_json": str
         }, pk="video_id", if_not_exists=True)
         logging.info("Database initialized.")
+    # analyze.py selects work by status; keep that an index lookup
+    videos.create_index(["status"], if_not_exists=True)
+
+    # table_xinfo (unlike table_info) also lists generated columns
+    existing = {row[1] for row in db.conn.execute("PRAGMA table_xinfo(videos)")}
+    for name, definition in GENERATED_COLUMNS.items():
+        if name not in existing:
+            db.conn.execute(f"ALTER TABLE videos ADD COLUMN [{name}] {definition}")
+    # Safety threshold queries only ever look at analyzed rows
+    db.conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_safety ON videos(safety_score) WHERE status = 'ANALYZED'")
     return db
 
 def parse_iso_time(time_str):
@@ -45,34 +84,131 @@ def parse_iso_time(time_str):
         return None
 
 def extract_video_id(url):
-    if "v=" in url:
-        return url.split("v=")[1]
-    return None
+    _, sep, tail = url.partition("v=")
+    if not sep:
+        return None
+    # Drop trailing query params such as &t=1s
+    video_id, _, _ = tail.partition("&")
+    return video_id or None
+
+JSON_WHITESPACE = " \t\r\n"
+# Characters that end a JSON token; a decode error followed by none of them
+# is a token cut off at the end of the buffer
+_TOKEN_ENDS = frozenset(JSON_WHITESPACE + ",:]}")
+
+def _runs_off_end(doc, pos):
+    """Whether the token at `pos` may continue past the end of `doc`."""
+    return _TOKEN_ENDS.isdisjoint(doc[pos:])
+
+def _truncated(error):
+    """Whether a JSONDecodeError only means the input stopped mid-value."""
+    return error.msg.startswith("Unterminated string") or _runs_off_end(error.doc, error.pos)
+
+def iter_history(path, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yields the entries of the top-level JSON array in `path` one at a time,
+    so only the current entry and one read buffer are held in memory rather
+    than the whole decoded Takeout export.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos = "", 0
+
+        def skip(chars):
+            # Advance past `chars`, refilling the buffer; False at end of file
+            nonlocal buf, pos
+            while True:
+                while pos < len(buf) and buf[pos] in chars:
+                    pos += 1
+                if pos < len(buf):
+                    return True
+                buf, pos = f.read(chunk_size), 0
+                if not buf:
+                    return False
+
+        def next_entry():
+            # Decode the entry at pos, reading more while it runs off the end
+            # of the buffer; errors before that point are real syntax errors
+            nonlocal buf, pos
+            while True:
+                try:
+                    entry, end = decoder.raw_decode(buf, pos)
+                    # Objects, arrays and strings are self-delimiting, but a
+                    # number cut by the buffer ("12" of "123") still decodes
+                    if buf[pos] in '{["' or not _runs_off_end(buf, end):
+                        pos = end
+                        return entry
+                    error = None
+                except json.JSONDecodeError as e:
+                    if not _truncated(e):
+                        raise
+                    error = e
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    if error:
+                        raise ValueError(f"Unexpected end of file in {path}") from error
+                    pos = end
+                    return entry
+                buf, pos = buf[pos:] + chunk, 0
+
+        def expect_more():
+            if not skip(JSON_WHITESPACE):
+                raise ValueError(f"Unexpected end of file in {path}: missing ']'")
+
+        if not skip(JSON_WHITESPACE) or buf[pos] != "[":
+            raise ValueError(f"Expected a JSON array in {path}")
+        pos += 1
+        expect_more()
+        if buf[pos] == "]":
+            return
+
+        # Exactly one ',' between entries and a closing ']'
+        while True:
+            yield next_entry()
+            expect_more()
+            if buf[pos] == "]":
+                return
+            if buf[pos] != ",":
+                raise ValueError(f"Expected ',' or ']' in {path}, found {buf[pos]!r}")
+            pos += 1
+            expect_more()
 
 def process_history():
     if not HISTORY_FILE.exists():
         logging.error(f"File not found: {HISTORY_FILE}")
         return
 
-    with open(HISTORY_FILE, "r") as f:
-        data = json.load(f)
-
     db = init_db()
     table = db["videos"]
     
-    # Pre-load existing IDs for accurate duplicate counting
-    existing_ids = set()
-    try:
-        existing_ids = {r["video_id"] for r in table.rows}
-    except Exception:
-        pass # Table might be empty
+    # Duplicates are rejected by the primary key (INSERT OR IGNORE), so they
+    # are counted from the row count delta instead of a preloaded ID set
+    count_before = table.count
+    batch = []
+    failed_count = 0
+
+    def flush():
+        nonlocal failed_count
+        try:
+            table.insert_all(batch, pk="video_id", ignore=True, batch_size=INSERT_BATCH_SIZE)
+        except Exception as e:
+            # The batch was rolled back; retry row by row so one bad record
+            # doesn't drop (and later count as duplicates) the rest
+            logging.error(f"Error inserting batch of {len(batch)} videos, retrying individually: {e}")
+            for record in batch:
+                try:
+                    table.insert(record, pk="video_id", ignore=True)
+                except Exception as e:
+                    failed_count += 1
+                    logging.error(f"Error inserting video {record['video_id']}: {e}")
+        batch.clear()
 
-    total_json_entries = len(data)
+    total_json_entries = 0
     skipped_metadata = 0
-    duplicates_count = 0
-    added_count = 0
+    valid_entries = 0
 
-    for entry in data:
+    for entry in iter_history(HISTORY_FILE):
+        total_json_entries += 1
         # Basic Validation
         if entry.get("header") != "YouTube":
             skipped_metadata += 1
@@ -86,10 +222,7 @@ def process_history():
             skipped_metadata += 1
             continue
 
-        # Check Duplicates
-        if video_id in existing_ids:
-            duplicates_count += 1
-            continue # Skip insertion
+        valid_entries += 1
 
         # Extract Channel Info
         subtitles = entry.get("subtitles", [])
@@ -109,18 +242,23 @@ def process_history():
             "status": "PENDING"
         }
         
-        try:
-            table.insert(record, pk="video_id")
-            added_count += 1
-            existing_ids.add(video_id)
-        except Exception as e:
-            logging.error(f"Error inserting {video_id}: {e}")
+        batch.append(record)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            flush()
+
+    if batch:
+        flush()
+
+    added_count = table.count - count_before
+    duplicates_count = valid_entries - added_count - failed_count
         
     logging.info(f"--- Ingestion Report ---")
     logging.info(f"Total Entries in JSON: {total_json_entries}")
     logging.info(f"Skipped (Invalid/No ID): {skipped_metadata}")
     logging.info(f"Duplicates (Already in DB or repeated in JSON): {duplicates_count}")
     logging.info(f"New Videos Added: {added_count}")
+    if failed_count:
+        logging.error(f"Failed to Insert: {failed_count}")
 
 if __name__ == "__main__":
     process_history()
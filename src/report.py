@@ -1,16 +1,36 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
 from sqlite_utils import Database
 from datetime import datetime
-import json
+import os
+
+# Fastest available JSON parser for the analysis payloads: orjson if installed,
+# else pandas' bundled C ujson, else the stdlib
+try:
+    from orjson import loads
+except ImportError:
+    try:
+        from pandas.io.json import ujson_loads as loads
+    except ImportError:
+        from json import loads
 
 # Setup
 st.set_page_config(page_title="SlopStopper Audit", page_icon="🛡️", layout="wide")
 DB_FILE = "data/slopstopper.db"
 
 def get_db():
-    return Database(DB_FILE)
+    db = Database(DB_FILE)
+    # Read-only tuning: bigger page cache, in-memory temp b-trees and
+    # memory-mapped reads for the full-table load. The journal mode is left
+    # to the writers (ingest/analyze), which switch the file to WAL
+    db.conn.execute("PRAGMA cache_size=-65536")
+    db.conn.execute("PRAGMA temp_store=MEMORY")
+    db.conn.execute("PRAGMA mmap_size=1073741824")
+    return db
 
 # Sidebar
 st.sidebar.header("🛡️ SlopStopper Control")
@@ -23,37 +43,116 @@ safety_threshold = st.sidebar.slider("Safety Threshold", 0, 100, 60, help="Video
 include_pending = st.sidebar.checkbox("Include Pending Videos", value=False)
 
 # Data Load
-@st.cache_data(ttl=60)
-def load_data():
+def flatten(d, prefix="", out=None):
+    """Flattens a nested dict into one {dotted_key: value} dict; lists are leaves."""
+    if out is None:
+        out = {}
+    for k, v in d.items():
+        key = prefix + k
+        if isinstance(v, dict):
+            flatten(v, key + ".", out)
+        else:
+            out[key] = v
+    return out
+
+def load_data(include_pending, min_date, max_date):
     db = get_db()
-    query = "SELECT * FROM videos"
+    # Only the columns the dashboard reads; everything else comes from analysis_json.
+    # The date range is applied here so out-of-range rows are never fetched or
+    # parsed; date() is NULL for missing/unparseable timestamps, which drops them
+    query = (
+        "SELECT video_id, title, video_url, channel_name, watch_timestamp, analysis_json FROM videos"
+        " WHERE date(watch_timestamp) BETWEEN ? AND ?"
+    )
     if not include_pending:
-        query += " WHERE status = 'ANALYZED'"
-    
-    rows = list(db.query(query))
-    if not rows:
-        return pd.DataFrame()
+        query += " AND status = 'ANALYZED'"
     
-    df = pd.DataFrame(rows)
+    # Column-wise fetch straight into the frame (no per-row dicts); timestamps
+    # are parsed on the way in. The connection is only needed for this read,
+    # so it is closed rather than left open (and mapped) per cache miss
+    try:
+        df = pd.read_sql_query(
+            query, db.conn, params=(min_date.isoformat(), max_date.isoformat()),
+            parse_dates=['watch_timestamp'], dtype_backend='pyarrow',
+        )
+    finally:
+        db.close()
+    if df.empty:
+        return df
     
-    # Parse the analysis_json field to extract deep data
-    # We use json_normalize to flatten the nested structure
+    # Parse the analysis_json field and flatten it into dotted columns
+    # (e.g. 'risk_assessment.safety_score'), one flat dict per row
     def parse_json(x):
         try:
-            return json.loads(x)
+            return loads(x)
         except:
             return {}
 
     if 'analysis_json' in df.columns:
-        json_data = df['analysis_json'].apply(parse_json).tolist()
-        df_json = pd.json_normalize(json_data)
-        # Verify we didn't lose rows or misalign
-        if len(df_json) == len(df):
-            df = pd.concat([df, df_json], axis=1)
+        # Only rows that have an analysis are parsed; pending rows get NaN
+        # from the index alignment in concat
+        present = df['analysis_json'].notna().to_numpy()
+        raw = df['analysis_json'].to_numpy()[present]
+        try:
+            parsed = [loads(x) for x in raw]
+        except (TypeError, ValueError):
+            # Invalid payloads: parse one by one
+            parsed = [parse_json(x) for x in raw]
+        flat_rows = [flatten(p) if isinstance(p, dict) else {} for p in parsed]
+        df_json = pd.DataFrame(flat_rows, index=df.index[present])
+        # Neither the raw text nor the parsed documents are kept: the frame is
+        # pickled into the disk cache, and the Deep Dive reads its one row's
+        # JSON through load_analysis()
+        df = pd.concat([df.drop(columns='analysis_json'), df_json], axis=1)
             
     return df
 
+# In memory only: one small document per entry, keyed on the DB's mtime like
+# prepare_df, so revisiting a video skips the query and the parse
+@st.cache_data(max_entries=256)
+def load_analysis(db_mtime, video_id):
+    """Fetches and parses one video's analysis_json for the Deep Dive; {} if it has none."""
+    db = get_db()
+    try:
+        row = db.conn.execute("SELECT analysis_json FROM videos WHERE video_id = ?", [video_id]).fetchone()
+    finally:
+        db.close()
+    try:
+        return loads(row[0]) if row and row[0] else {}
+    except (TypeError, ValueError):
+        return {}
+
 # --- CONSTANTS & CONFIG ---
+# Columns the Diet tab's time-series charts read
+TIME_SERIES_COLS = [
+    'watch_timestamp',
+    'narrative_quality.structural_integrity',
+    'narrative_quality.creative_intent',
+    'narrative_quality.weirdness_verdict',
+    'density_clean',
+    'cognitive_nutrition.emotional_volatility',
+    'video_metadata.format',
+    'video_metadata.duration_perceived',
+    'Quality Score',
+    'verdict.action',
+]
+# Enum-like columns with a handful of distinct values, stored as categoricals
+# so groupbys, counts and comparisons work on integer codes
+CATEGORY_COLS = [
+    'Genre',
+    'Topic',
+    'content_taxonomy.target_demographic',
+    'narrative_quality.structural_integrity',
+    'narrative_quality.creative_intent',
+    'narrative_quality.weirdness_verdict',
+    'density_clean',
+    'cognitive_nutrition.emotional_volatility',
+    'visual_grounding.setting',
+]
+TREEMAP_BUCKET_ROWS = 500  # above this many videos, rare topics are bucketed
+TREEMAP_MIN_TOPIC_SIZE = 3  # topics with fewer videos go to "Other"
+TREEMAP_MAX_TOPIC_LEAVES = 25  # bigger topics are drawn as a single tile
+
 FINGERPRINT_CONFIG = {
     "Structure": {
         "col": "narrative_quality.structural_integrity",
@@ -88,34 +187,84 @@ FINGERPRINT_CONFIG = {
     }
 }
 
-def render_mini_fingerprint(row):
-    """Generates a compact HTML row of badges for the validation metrics."""
-    html = "<div style='display: flex; flex-wrap: wrap; gap: 5px; margin-bottom: 8px;'>"
+BG_MAP = {"green": "#d4edda", "orange": "#fff3cd", "red": "#f8d7da", "blue": "#cce5ff", "purple": "#e2e3e5"}
+TEXT_MAP = {"green": "#155724", "orange": "#856404", "red": "#721c24", "blue": "#004085", "purple": "#383d41"}
+
+def badge_html(label, val, colors):
+    """HTML for one fingerprint badge."""
+    color_key = colors.get(val, 'blue')
+    bg = BG_MAP.get(color_key, "#e2e3e5")
+    fg = TEXT_MAP.get(color_key, "#383d41")
     
-    bg_map = {"green": "#d4edda", "orange": "#fff3cd", "red": "#f8d7da", "blue": "#cce5ff", "purple": "#e2e3e5"}
-    text_map = {"green": "#155724", "orange": "#856404", "red": "#721c24", "blue": "#004085", "purple": "#383d41"}
+    display_val = str(val).replace('_', ' ')
+    
+    badge_style = (
+        f"background-color: {bg}; color: {fg}; "
+        f"padding: 2px 6px; border-radius: 4px; "
+        f"font-size: 0.75rem; font-weight: 600; border: 1px solid {fg};"
+    )
+    return f"<div style='{badge_style}'>{label}: {display_val}</div>"
 
-    for label, cfg in FINGERPRINT_CONFIG.items():
-        val = row.get(cfg['col'], 'Unknown')
-        # specific handling for density split
-        if label == "Density" and val and isinstance(val, str):
-            val = val.split(" ")[0]
-            
-        color_key = cfg['colors'].get(val, 'blue')
-        bg = bg_map.get(color_key, "#e2e3e5")
-        fg = text_map.get(color_key, "#383d41")
+# label -> {value: badge html}. Every badge for a known value is fixed, so
+# build them once; 'Unknown' also covers missing values.
+BADGE_HTML = {
+    label: {val: badge_html(label, val, cfg['colors']) for val in cfg['opts'] + ['Unknown']}
+    for label, cfg in FINGERPRINT_CONFIG.items()
+}
+
+def scale_html(title, current_val, options, color_map):
+    """HTML for one Deep Dive scale: every option side by side, the current one highlighted."""
+    parts = [f"<div style='margin-bottom: 10px;'><div style='font-weight:bold; margin-bottom:4px;'>{title}</div><div style='display: flex; gap: 5px;'>"]
+    for opt in options:
+        is_selected = (opt == current_val)
+        bg_color = "#f0f2f6"
+        text_color = "#31333f"
+        border = "1px solid #e0e0e0"
         
-        display_val = str(val).replace('_', ' ')
+        if is_selected:
+            base_color = color_map.get(opt, "blue")
+            bg_color = BG_MAP.get(base_color, "#cce5ff")
+            text_color = TEXT_MAP.get(base_color, "#004085")
+            border = f"2px solid {text_color}"
         
-        badge_style = (
-            f"background-color: {bg}; color: {fg}; "
-            f"padding: 2px 6px; border-radius: 4px; "
-            f"font-size: 0.75rem; font-weight: 600; border: 1px solid {fg};"
+        div_style = (
+            f"flex: 1; "
+            f"background-color: {bg_color}; "
+            f"color: {text_color}; "
+            f"border: {border}; "
+            f"border-radius: 4px; "
+            f"padding: 4px; "
+            f"text-align: center; "
+            f"font-size: 11px; "
+            f"font-weight: {'bold' if is_selected else 'normal'};"
         )
-        html += f"<div style='{badge_style}'>{label}: {display_val}</div>"
         
-    # QUALITY SCORE BADGE
-    q_score = row.get('Quality Score', 0.0)
+        label_text = opt.replace('_', ' ').replace(' ', '&nbsp;')
+        parts.append(f'<div style="{div_style}">{label_text}</div>')
+    parts.append("</div></div>")
+    return "".join(parts)
+
+# Deep Dive scale titles, in display order
+SCALE_TITLES = {
+    "Structure": "Structure",
+    "Intent": "Intent",
+    "Weirdness": "Weirdness",
+    "Density": "Intellectual Density",
+    "Volatility": "Emotional Volatility",
+}
+
+# label -> {selected value: scale html}. Each scale has a handful of options,
+# so every variant is rendered once; the None entry has nothing selected and
+# stands in for unknown/missing values.
+SCALE_HTML = {
+    label: {
+        val: scale_html(title, val, FINGERPRINT_CONFIG[label]['opts'], FINGERPRINT_CONFIG[label]['colors'])
+        for val in FINGERPRINT_CONFIG[label]['opts'] + [None]
+    }
+    for label, title in SCALE_TITLES.items()
+}
+
+def quality_badge_html(q_score):
     # Color based on score
     if q_score >= 7.0:
         q_color = "green"
@@ -124,77 +273,163 @@ def render_mini_fingerprint(row):
     else:
         q_color = "red"
         
-    q_bg = bg_map.get(q_color)
-    q_fg = text_map.get(q_color)
+    q_bg = BG_MAP.get(q_color)
+    q_fg = TEXT_MAP.get(q_color)
     q_style = (
          f"background-color: {q_bg}; color: {q_fg}; "
         f"padding: 2px 8px; border-radius: 4px; "
         f"font-size: 0.75rem; font-weight: bold; border: 2px solid {q_fg}; margin-left: auto;"
     )
-    html += f"<div style='{q_style}'>Quality Score: {q_score:.1f}/10</div>"
-    
-    html += "</div>"
-    return html
+    return f"<div style='{q_style}'>Quality Score: {q_score:.1f}/10</div>"
 
-df = load_data()
-
-if df.empty:
-    st.warning("No data found. RUN THE PIPELINE: `uv run src/ingest.py` -> `uv run src/analyze.py --limit 10`")
-    st.stop()
-
-# Helper: Ensure columns exist (handling cases where json might be partial)
-def ensure_col(df, col, default=False):
-    if col not in df.columns:
-        df[col] = default
-    return df
+# Deep Dive's big Quality Score panel: color -> style string, built once
+QUALITY_PANEL_STYLES = {
+    color: (
+        f"background-color: {BG_MAP[color]}; color: {TEXT_MAP[color]}; border: 2px solid {TEXT_MAP[color]}; "
+        f"padding: 10px; border-radius: 8px; text-align: center; margin-bottom: 20px;"
+    )
+    for color in ("green", "orange", "red")
+}
 
-# Normalize Columns
-df['safety_score'] = pd.to_numeric(df['risk_assessment.safety_score'], errors='coerce').fillna(100)
-# Use the parsed JSON booleans which are more reliable/typed than SQLite 0/1 if available, else fallback
-df = ensure_col(df, 'cognitive_nutrition.is_slop', False)
-df = ensure_col(df, 'cognitive_nutrition.is_brainrot', False)
-df = ensure_col(df, 'content_taxonomy.primary_genre', 'Unknown')
-df = ensure_col(df, 'content_taxonomy.specific_topic', 'Unknown')
-df = ensure_col(df, 'content_taxonomy.target_demographic', 'Unknown')
-
-# Synthesize Quality Score (0-10) based on Narrative & Intent
-# Synthesize Quality Score (0-10) based on ALL Dimensions
-df['total_score'] = 0.0
-df['score_components'] = 0
-
-for label, cfg in FINGERPRINT_CONFIG.items():
-    col = cfg['col']
-    scores_map = cfg.get('scores', {})
-    
-    # helper for density split
-    def get_score_val(x):
-        if label == "Density" and isinstance(x, str):
-            x = x.split(" ")[0]
-        return scores_map.get(x, 5.0) # Default to mid-point 5.0 if unknown
-    
-    if col in df.columns:
-        df['total_score'] += df[col].apply(get_score_val)
-        df['score_components'] += 1
+def render_mini_fingerprints(videos):
+    """
+    Generates the compact HTML badge row for each video in `videos`, working
+    column by column against the precomputed BADGE_HTML table.
+    """
+    badge_cols = []
+    for label, cfg in FINGERPRINT_CONFIG.items():
+        # Density badges use the short form precomputed in prepare_df
+        col = 'density_clean' if label == "Density" else cfg['col']
+        table = BADGE_HTML[label]
+        if col not in videos.columns:
+            badge_cols.append([table['Unknown']] * len(videos))
+            continue
+        # Categorical columns can't take the new 'Unknown' value, so fill as object
+        vals = videos[col].astype(object).fillna('Unknown')
+        badges = vals.map(table)
+        # Values outside the schema's options are rendered on the fly
+        misses = badges.isna()
+        if misses.any():
+            badges[misses] = [badge_html(label, v, cfg['colors']) for v in vals[misses]]
+        badge_cols.append(badges.tolist())
+
+    if 'Quality Score' in videos.columns:
+        q_scores = videos['Quality Score'].tolist()
+    else:
+        q_scores = [0.0] * len(videos)
+
+    return [
+        "<div style='display: flex; flex-wrap: wrap; gap: 5px; margin-bottom: 8px;'>"
+        + "".join(badges) + quality_badge_html(q_score) + "</div>"
+        for *badges, q_score in zip(*badge_cols, q_scores)
+    ]
+
+# Fallbacks for analysis fields a partial JSON (or an all-pending DB) never produced
+COLUMN_DEFAULTS = {
+    'cognitive_nutrition.is_slop': False,
+    'cognitive_nutrition.is_brainrot': False,
+    'content_taxonomy.primary_genre': 'Unknown',
+    'content_taxonomy.specific_topic': 'Unknown',
+    'content_taxonomy.target_demographic': 'Unknown',
+}
 
-# Average
-df['Quality Score'] = df['total_score'] / df['score_components'].replace(0, 1)
+def score_lookup(values, scores_map):
+    """Maps category values to scores with one vectorized gather; unknown values score 5.0."""
+    codes = pd.Categorical(values, categories=list(scores_map)).codes
+    # Code -1 (unknown/missing) indexes the trailing mid-point default
+    lookup = np.array(list(scores_map.values()) + [5.0])
+    return lookup[codes]
+
+# Persisted to disk so a restarted app (or a new session) skips the JSON parse;
+# ttl is not supported for persisted caches, db_mtime handles invalidation
+@st.cache_data(persist="disk", max_entries=16)
+def prepare_df(db_mtime, include_pending, min_date, max_date):
+    """
+    Loads the videos in the selected date range and derives every column the
+    tabs use. Cached on the DB's mtime and the sidebar filters, so other
+    widget changes are served from the cache.
+    """
+    df = load_data(include_pending, min_date, max_date)
+    if df.empty:
+        return df
+
+    # Normalize Columns
+    df['safety_score'] = pd.to_numeric(df['risk_assessment.safety_score'], errors='coerce').fillna(100)
+    # Use the parsed JSON booleans which are more reliable/typed than SQLite 0/1 if available, else fallback
+    # Add any missing ones in a single assign rather than one insert per column
+    df = df.assign(**{c: v for c, v in COLUMN_DEFAULTS.items() if c not in df.columns})
+
+    # Density values look like "High (Educational)"; charts, badges and the
+    # score all key on the first word
+    density_col = 'cognitive_nutrition.intellectual_density'
+    if density_col in df.columns:
+        df['density_clean'] = df[density_col].astype(object).str.split(' ', n=1).str[0].fillna('Unknown')
+    else:
+        df['density_clean'] = 'Unknown'
+
+    # Synthesize Quality Score (0-10) based on ALL Dimensions: the mean of the
+    # per-dimension scores, one (n_videos, n_dimensions) matrix reduction
+    dim_scores = [
+        score_lookup(df['density_clean'] if label == "Density" else df[cfg['col']], cfg.get('scores', {}))
+        for label, cfg in FINGERPRINT_CONFIG.items()
+        if cfg['col'] in df.columns
+    ]
+    df['Quality Score'] = np.column_stack(dim_scores).mean(axis=1) if dim_scores else 0.0
+
+    # Rename for easier plotting; as plain bools these double as the Audit
+    # tab's masks (rows without an analysis count as False)
+    df['Is Slop'] = df['cognitive_nutrition.is_slop'].eq(True)
+    df['Is Brainrot'] = df['cognitive_nutrition.is_brainrot'].eq(True)
+    df['Genre'] = df['content_taxonomy.primary_genre']
+    df['Topic'] = df['content_taxonomy.specific_topic'].fillna('Generic')
+
+    # Risk flags as one bool block; rows without an analysis count as unflagged
+    flag_cols = [c for c in df.columns if c.startswith('risk_assessment.flags.')]
+    df[flag_cols] = df[flag_cols].eq(True)
+    # Display names of each row's raised flags, for the Deep Dive
+    flag_labels = np.array([c.replace('risk_assessment.flags.', '').replace('_', ' ').title() for c in flag_cols], dtype=object)
+    df['_active_flags'] = [tuple(flag_labels[raised]) for raised in df[flag_cols].to_numpy(dtype=bool)]
+
+    # Deep Dive selectbox labels: verdict emoji + [Quality Score] Title | Channel
+    action = df['verdict.action'] if 'verdict.action' in df.columns else pd.Series('Unknown', index=df.index)
+    icons = np.select(
+        [action.eq('Approve'), action.eq('Monitor'), action.str.contains('Block', regex=False, na=False)],
+        ["🟢", "🟡", "🔴"],
+        default="⚪",
+    )
+    df['_option_label'] = [
+        f"{icon} [{q:.1f}] {title} | {channel}"
+        for icon, q, title, channel in zip(icons, df['Quality Score'], df['title'], df['channel_name'].fillna('Unknown'))
+    ]
 
-# Normalize for plotting
-df = ensure_col(df, 'Quality Score', 0.0)
+    # Lower-cased Title/ID/Channel text for the Deep Dive search; the unit
+    # separator keeps a match from spanning two fields
+    df['_search_idx'] = (
+        df['title'].fillna('') + '\x1f' + df['video_id'].fillna('') + '\x1f' + df['channel_name'].fillna('')
+    ).str.lower()
 
+    category_cols = [c for c in CATEGORY_COLS if c in df.columns]
+    df[category_cols] = df[category_cols].astype('category')
 
+    return df
 
-# Rename for easier plotting
-df['Is Slop'] = df['cognitive_nutrition.is_slop']
-df['Is Brainrot'] = df['cognitive_nutrition.is_brainrot']
-df['Genre'] = df['content_taxonomy.primary_genre']
-df['Topic'] = df['content_taxonomy.specific_topic'].fillna('Generic')
+# In WAL mode the analyzer's commits land in the -wal file and only reach the
+# main file at checkpoints, so the newer of the two mtimes keys the cache
+db_mtime = max(
+    (os.path.getmtime(path) for path in (DB_FILE, DB_FILE + "-wal") if os.path.exists(path)),
+    default=None,
+)
+df = prepare_df(db_mtime, include_pending, min_date, max_date)
 
-# Date Filter (if timestamp available)
-if 'watch_timestamp' in df.columns:
-    df['watch_timestamp'] = pd.to_datetime(df['watch_timestamp'], errors='coerce')
-    # Filter by selected date range
-    df = df[(df['watch_timestamp'].dt.date >= min_date) & (df['watch_timestamp'].dt.date <= max_date)]
+if df.empty:
+    db = get_db()
+    has_videos = bool(db["videos"].count)
+    db.close()
+    if has_videos:
+        st.warning("No videos in the selected date range.")
+    else:
+        st.warning("No data found. RUN THE PIPELINE: `uv run src/ingest.py` -> `uv run src/analyze.py --limit 10`")
+    st.stop()
 
 # --- GLOBAL STYLING ---
 st.markdown("""
@@ -318,17 +553,35 @@ if selected_tab == nav_options[0]:
 
     # --- SHARED DATA PREP FOR DIET TAB ---
     if 'watch_timestamp' in df.columns:
-        ts_df = df.copy()
+        # Only the timestamp and the plotted category columns
+        ts_df = df[[c for c in TIME_SERIES_COLS if c in df.columns]].copy()
         ts_df['Date'] = ts_df['watch_timestamp'].dt.date
+        # Dates are factorized once and shared by every time-series chart
+        ts_df['date_code'], ts_dates = pd.factorize(ts_df['Date'], sort=True)
     else:
         ts_df = pd.DataFrame()
 
+    def count_by_date(dataframe, col_name):
+        """Same rows as groupby(['Date', col_name]).size(), via one bincount over (date, category) codes."""
+        cat_codes, cat_values = pd.factorize(dataframe[col_name], sort=True)
+        date_codes = dataframe['date_code'].to_numpy()
+        valid = (date_codes >= 0) & (cat_codes >= 0)
+        n_cats = len(cat_values)
+        counts = np.bincount(date_codes[valid] * n_cats + cat_codes[valid], minlength=len(ts_dates) * n_cats)
+        # Non-zero cells in row-major order keep groupby's (Date, category) sort
+        cells = np.flatnonzero(counts)
+        return pd.DataFrame({
+            'Date': ts_dates[cells // n_cats],
+            col_name: cat_values[cells % n_cats],
+            'Count': counts[cells]
+        })
+
     def plot_time_series(dataframe, col_name, title, color_map_dict=None, custom_order=None):
         if dataframe.empty or col_name not in dataframe.columns:
             return None
         
         # Aggregate: Count by Date + Category
-        agg = dataframe.groupby(['Date', col_name]).size().reset_index(name='Count')
+        agg = count_by_date(dataframe, col_name)
         
         # CLEANUP: Prettify Labels
         # 1. Clean values (replace '_' with ' ')
@@ -342,43 +595,80 @@ if selected_tab == nav_options[0]:
                 clean_k = str(k).replace('_', ' ')
                 clean_color_map[clean_k] = v
         
-        # 3. Handle Custom Order (also clean the order labels)
-        plot_orders = {}
+        # 3. Trace order: custom order first (also cleaned), then the rest in order of appearance
+        categories = list(dict.fromkeys(agg[clean_col]))
         if custom_order:
-            # Clean the custom order strings too to match the data
             clean_order = [str(x).replace('_', ' ') for x in custom_order]
-            plot_orders = {clean_col: clean_order}
-                
-        # Create Plot
-        fig = px.bar(
-            agg, 
-            x='Date', 
-            y='Count', 
-            color=clean_col, # Use cleaned column
+            present = set(categories)
+            categories = [c for c in clean_order if c in present] + [c for c in categories if c not in clean_order]
+
+        # Create Plot: one stacked bar trace per category, built directly as
+        # graph objects. Unmapped categories take template colors like px does.
+        colorway = pio.templates["plotly_dark"].layout.colorway
+        rows_by_cat = agg.groupby(clean_col, sort=False).indices
+        dates = agg['Date'].to_numpy()
+        counts = agg['Count'].to_numpy()
+        fig = go.Figure()
+        for cat in categories:
+            if cat not in clean_color_map:
+                clean_color_map[cat] = colorway[len(clean_color_map) % len(colorway)]
+            idx = rows_by_cat[cat]
+            fig.add_trace(go.Bar(
+                x=dates[idx],
+                y=counts[idx],
+                name=cat,
+                legendgroup=cat,
+                marker_color=clean_color_map[cat],
+                hovertemplate=f"{title}={cat}<br>Date=%{{x}}<br>Count=%{{y}}<extra></extra>"
+            ))
+        fig.update_layout(
             title=title,
-            color_discrete_map=clean_color_map, # Use list of mapped colors
             template="plotly_dark",
-            labels={clean_col: title}, # Rename Legend Title to match Chart Title
-            category_orders=plot_orders 
+            barmode="relative",
+            legend_title_text=title, # Legend Title matches Chart Title
+            xaxis_title="Date",
+            yaxis_title="Count",
+            # Remove gap between bars to look like a stream/density
+            bargap=0.1,
+            # Keep zoom/legend state across reruns
+            uirevision="ts_charts"
         )
-        # Remove gap between bars to look like a stream/density
-        fig.update_layout(bargap=0.1) 
         return fig
 
     with r1c1:
         st.subheader("📚 Taxonomy")
         if not df.empty:
             # Use full DF for leaf-level detail
-            tmap_df = df.copy()
+            tmap_df = df[['Genre', 'Topic', 'video_id', 'title', 'channel_name', 'safety_score']].copy()
             tmap_df['Value'] = 1
             # Ensure string types for path components
             tmap_df['Genre'] = tmap_df['Genre'].astype(str)
             tmap_df['Topic'] = tmap_df['Topic'].astype(str)
             tmap_df['video_id'] = tmap_df['video_id'].astype(str)
             
+            # Large histories: fold rare topics into one "Other" node per genre
+            # to keep the number of rendered treemap nodes down
+            if len(tmap_df) > TREEMAP_BUCKET_ROWS:
+                topic_counts = tmap_df.groupby(['Genre', 'Topic'])['Topic'].transform('size')
+                tmap_df.loc[topic_counts < TREEMAP_MIN_TOPIC_SIZE, 'Topic'] = 'Other'
+            
             # Create a combined label for the leaf node
             tmap_df['LeafLabel'] = tmap_df['title'] + " (" + tmap_df['video_id'] + ")"
 
+            # Large histories: big topics are sent as one pre-aggregated tile
+            # (count + mean safety) instead of one leaf per video
+            if len(tmap_df) > TREEMAP_BUCKET_ROWS:
+                topic_counts = tmap_df.groupby(['Genre', 'Topic'])['Topic'].transform('size')
+                big = topic_counts > TREEMAP_MAX_TOPIC_LEAVES
+                rollup = tmap_df[big].groupby(['Genre', 'Topic'], as_index=False).agg(
+                    Value=('Value', 'sum'),
+                    safety_score=('safety_score', 'mean')
+                )
+                # One summary leaf per rolled-up topic keeps every path the same depth
+                rollup['LeafLabel'] = rollup['Value'].astype(str) + " videos"
+                rollup[['title', 'channel_name', 'video_id']] = ""
+                tmap_df = pd.concat([tmap_df[~big], rollup], ignore_index=True)
+
             fig_tree = px.treemap(
                 tmap_df, 
                 path=[px.Constant("YouTube History"), 'Genre', 'Topic', 'LeafLabel'], 
@@ -408,8 +698,8 @@ if selected_tab == nav_options[0]:
         st.subheader("⚠️ Risk Radar (Aggregate)")
         flag_cols = [c for c in df.columns if 'risk_assessment.flags.' in c]
         if flag_cols:
-            risk_counts = df[flag_cols].sum().reset_index()
-            risk_counts.columns = ['Flag', 'Count']
+            # Flag columns are bool (see prepare_df): one column-wise sum over the matrix
+            risk_counts = pd.DataFrame({'Flag': flag_cols, 'Count': df[flag_cols].to_numpy().sum(axis=0)})
             # IMPROVEMENT: Format Flag names nicely (remove prefix, replace underscores, title case)
             risk_counts['Flag'] = risk_counts['Flag'].str.replace('risk_assessment.flags.', '') \
                                                      .str.replace('_', ' ') \
@@ -458,12 +748,7 @@ if selected_tab == nav_options[0]:
             "Lazy_Randomness": "orange", 
             "Disturbing_Uncanny": "red"
         }
-        # 4. Density (Prefix matching logic needed? The DB values are consistent strings usually)
-        # The DB strings might be "High (..)" so we need to maybe clean them first or mapped exact strings.
-        # Let's clean the DF column for plotting first like we did for Deep Dive display?
-        # For now, assuming exact matches or we use the raw strings.
-        # Deep Dive logic: `short_val = db_val.split(" ")[0]`. Let's apply that.
-        ts_df['density_clean'] = ts_df['cognitive_nutrition.intellectual_density'].apply(lambda x: str(x).split(' ')[0] if pd.notnull(x) else "Unknown")
+        # 4. Density (plotted from the short 'density_clean' form built in prepare_df)
         dens_colors = {"High": "green", "Medium": "green", "Low": "orange", "Void": "red"}
         
         # 5. Volatility
@@ -558,6 +843,7 @@ if selected_tab == nav_options[0]:
                 color='Genre', 
                 hover_data=['title', 'Topic'],
                 title="Quality (Narrative) vs Safety",
+                render_mode='webgl',
                 text='title' if len(df) < 50 else None # Only show labels if few points
             )
             
@@ -675,10 +961,11 @@ elif selected_tab == nav_options[1]:
                 st.markdown(f"#### 🔍 Inspecting: **{selected_channel}**")
                 channel_bad_vids = risky_videos[risky_videos['channel_name'] == selected_channel]
                 
-                for _, vid in channel_bad_vids.head(5).iterrows():
+                shown = channel_bad_vids.head(5)
+                for (_, vid), fingerprint in zip(shown.iterrows(), render_mini_fingerprints(shown)):
                      with st.expander(f"🚫 {vid['title'][:50]}...", expanded=True):
                          st.error(f"**Safety:** {vid['safety_score']} | **Quality:** {vid['Quality Score']:.1f} | **Reason:** {vid.get('verdict.reason', 'N/A')}")
-                         st.markdown(render_mini_fingerprint(vid), unsafe_allow_html=True)
+                         st.markdown(fingerprint, unsafe_allow_html=True)
                          st.video(vid['video_url'])
             else:
                 st.info("👆 Select a channel to see their violations.")
@@ -691,19 +978,22 @@ elif selected_tab == nav_options[1]:
         
         spot_tabs = st.tabs(["💀 Brainrot", "🤬 Aggression", "🧟 Slop"])
         
-        def show_toxic_video(videorow):
+        def show_toxic_videos(videos):
+            for (_, videorow), fingerprint in zip(videos.iterrows(), render_mini_fingerprints(videos)):
+                show_toxic_video(videorow, fingerprint)
+
+        def show_toxic_video(videorow, fingerprint):
              with st.expander(f"⚠️ {videorow['title'][:40]}...", expanded=False):
                 st.write(f"**Reason:** {videorow.get('verdict.reason', 'N/A')}")
-                st.markdown(render_mini_fingerprint(videorow), unsafe_allow_html=True)
+                st.markdown(fingerprint, unsafe_allow_html=True)
                 st.video(videorow['video_url'])
         
         with spot_tabs[0]:
             # Brainrot: High Weirdness OR Explicit Brainrot Flag
-            br_mask = (df['cognitive_nutrition.is_brainrot'] == True) | (df['narrative_quality.weirdness_verdict'] == 'Disturbing_Uncanny')
+            br_mask = df['Is Brainrot'] | (df['narrative_quality.weirdness_verdict'] == 'Disturbing_Uncanny')
             br_vids = df[br_mask]
             if not br_vids.empty:
-                for _, vid in br_vids.head(3).iterrows():
-                    show_toxic_video(vid)
+                show_toxic_videos(br_vids.head(3))
             else:
                 st.caption("No brainrot detected.")
 
@@ -712,18 +1002,16 @@ elif selected_tab == nav_options[1]:
             agg_mask = (df['cognitive_nutrition.emotional_volatility'] == 'Aggressive_Screaming')
             agg_vids = df[agg_mask]
             if not agg_vids.empty:
-                for _, vid in agg_vids.head(3).iterrows():
-                    show_toxic_video(vid)
+                show_toxic_videos(agg_vids.head(3))
             else:
                 st.caption("No aggression detected.")
                 
         with spot_tabs[2]:
             # Slop: Explicit Slop Flag
-            slop_mask = (df['cognitive_nutrition.is_slop'] == True)
+            slop_mask = df['Is Slop']
             slop_vids = df[slop_mask]
             if not slop_vids.empty:
-                for _, vid in slop_vids.head(3).iterrows():
-                    show_toxic_video(vid)
+                show_toxic_videos(slop_vids.head(3))
             else:
                 st.caption("No slop detected.")
     
@@ -764,31 +1052,14 @@ elif selected_tab == nav_options[2]:
     with c_search:
         search_term = st.text_input("Search", "", label_visibility="collapsed", placeholder="Search Title, ID, Channel", key="deep_dive_search")
     
-    filtered_df = df.copy()
+    # Positions of the matching videos; the option labels are prebuilt in prepare_df
     if search_term:
-        mask = (
-            df['title'].str.contains(search_term, case=False, na=False) | 
-            df['video_id'].str.contains(search_term, case=False, na=False) |
-            df['channel_name'].str.contains(search_term, case=False, na=False)
-        )
-        filtered_df = df[mask]
-        
-    if not filtered_df.empty:
-        # Enhanced Display Format: Emoji + [Score] Title | Channel
-        filtered_df['display_channel'] = filtered_df['channel_name'].fillna('Unknown')
+        matches = np.flatnonzero(df['_search_idx'].str.contains(search_term.lower(), regex=False))
+    else:
+        matches = np.arange(len(df))
         
-        def format_option(x):
-            action = x.get('verdict.action', 'Unknown')
-            q = x.get('Quality Score', 0.0)
-            
-            if action == 'Approve': icon = "🟢"
-            elif action == 'Monitor': icon = "🟡"
-            elif action and 'Block' in action: icon = "🔴"
-            else: icon = "⚪"
-            
-            return f"{icon} [{q:.1f}] {x['title']} | {x['display_channel']}"
-            
-        vid_options = filtered_df.apply(format_option, axis=1).tolist()
+    if len(matches):
+        vid_options = df['_option_label'].to_numpy()[matches]
         
         if 'deep_dive_video_idx' not in st.session_state:
             st.session_state.deep_dive_video_idx = 0
@@ -802,9 +1073,7 @@ elif selected_tab == nav_options[2]:
                 key="deep_dive_video_idx"
             )
         
-        # Retrieve ID directly from dataframe (safer than string parsing)
-        selected_vid_id = filtered_df.iloc[selected_idx]['video_id']
-        row = df[df['video_id'] == selected_vid_id].iloc[0]
+        row = df.iloc[matches[selected_idx]]
 
         
         # ==================== LAYOUT: Video (Left), Fingerprint (Right) ====================
@@ -839,73 +1108,18 @@ elif selected_tab == nav_options[2]:
         with right_col:
             st.markdown("##### 🧬 Content Fingerprint")
             
-            # Helper to generate HTML for a single scale row
-            def get_scale_html(label, current_val, options, color_map=None):
-                html = f"<div style='margin-bottom: 10px;'><div style='font-weight:bold; margin-bottom:4px;'>{label}</div><div style='display: flex; gap: 5px;'>"
-                for opt in options:
-                    is_selected = (opt == current_val)
-                    bg_color = "#f0f2f6"
-                    text_color = "#31333f"
-                    border = "1px solid #e0e0e0"
-                    
-                    if is_selected:
-                        base_color = "blue"
-                        if color_map: base_color = color_map.get(opt, "blue")
-                        bg_map = {"green": "#d4edda", "orange": "#fff3cd", "red": "#f8d7da", "blue": "#cce5ff"}
-                        text_map = {"green": "#155724", "orange": "#856404", "red": "#721c24", "blue": "#004085"}
-                        bg_color = bg_map.get(base_color, "#cce5ff")
-                        text_color = text_map.get(base_color, "#004085")
-                        border = f"2px solid {text_color}"
-                    
-                    div_style = (
-                        f"flex: 1; "
-                        f"background-color: {bg_color}; "
-                        f"color: {text_color}; "
-                        f"border: {border}; "
-                        f"border-radius: 4px; "
-                        f"padding: 4px; "
-                        f"text-align: center; "
-                        f"font-size: 11px; "
-                        f"font-weight: {'bold' if is_selected else 'normal'};"
-                    )
-                    
-                    label_text = opt.replace('_', ' ').replace(' ', '&nbsp;')
-                    html += f'<div style="{div_style}">{label_text}</div>'
-                html += "</div></div>"
-                return html
-
-            # Build all HTML first
-            full_html = ""
-            
-            # 1. Structure
-            struct_opts = ["Coherent_Narrative", "Loose_Vlog_Style", "Compilation_Clips", "Incoherent_Chaos"]
-            struct_colors = {"Coherent_Narrative": "green", "Loose_Vlog_Style": "orange", "Compilation_Clips": "orange", "Incoherent_Chaos": "red"}
-            full_html += get_scale_html("Structure", row.get('narrative_quality.structural_integrity', 'Unknown'), struct_opts, struct_colors)
-            
-            # 2. Intent
-            intent_opts = ["Artistic/Creative", "Informational", "Parasocial/Vlog", "Algorithmic/Slop"]
-            intent_colors = {"Artistic/Creative": "green", "Informational": "green", "Parasocial/Vlog": "orange", "Algorithmic/Slop": "red"}
-            full_html += get_scale_html("Intent", row.get('narrative_quality.creative_intent', 'Unknown'), intent_opts, intent_colors)
-            
-            # 3. Weirdness
-            weird_opts = ["Normal", "Creative_Surrealism", "Lazy_Randomness", "Disturbing_Uncanny"]
-            weird_colors = {"Normal": "green", "Creative_Surrealism": "green", "Lazy_Randomness": "red", "Disturbing_Uncanny": "red"}
-            full_html += get_scale_html("Weirdness", row.get('narrative_quality.weirdness_verdict', 'Unknown'), weird_opts, weird_colors)
-            
-            # 4. Density
-            dens_opts = ["High", "Medium", "Low", "Void"]
-            # Map long values from DB to short display values
-            db_val = row.get('cognitive_nutrition.intellectual_density', 'Unknown')
-            short_val = db_val.split(" ")[0] if db_val else "Unknown" # Extract "High" from "High (Educational)"
-            dens_colors = {"High": "green", "Medium": "green", "Low": "orange", "Void": "red"}
-            full_html += get_scale_html("Intellectual Density", short_val, dens_opts, dens_colors)
-            
-            # 5. Emotional Volatility
-            vol_opts = ["Calm", "Upbeat", "High_Stress", "Aggressive_Screaming"]
-            vol_colors = {"Calm": "green", "Upbeat": "green", "High_Stress": "orange", "Aggressive_Screaming": "red"}
-            full_html += get_scale_html("Emotional Volatility", row.get('cognitive_nutrition.emotional_volatility', 'Unknown'), vol_opts, vol_colors)
+            # Pull the scale values in one lookup; columns a partial analysis
+            # never produced read as 'Unknown'. Density shows the short form
+            # built in prepare_df
+            scale_vals = row.reindex([
+                'density_clean' if label == "Density" else FINGERPRINT_CONFIG[label]['col']
+                for label in SCALE_HTML
+            ], fill_value='Unknown')
+            full_html = "".join(
+                htmls.get(val, htmls[None]) for htmls, val in zip(SCALE_HTML.values(), scale_vals)
+            )
             
-            # 6. Quality Score
+            # Quality Score
             val_qs = row.get('Quality Score', 0.0)
             if val_qs >= 7.0:
                  qs_color = "green"
@@ -918,12 +1132,8 @@ elif selected_tab == nav_options[2]:
                  qs_msg = "Toxic Slop"
                  
             # Custom big display for Score
-            qs_bg = {"green": "#d4edda", "orange": "#fff3cd", "red": "#f8d7da"}.get(qs_color)
-            qs_fg = {"green": "#155724", "orange": "#856404", "red": "#721c24"}.get(qs_color)
-            
             qs_html = (
-                f"<div style='background-color: {qs_bg}; color: {qs_fg}; border: 2px solid {qs_fg}; "
-                f"padding: 10px; border-radius: 8px; text-align: center; margin-bottom: 20px;'>"
+                f"<div style='{QUALITY_PANEL_STYLES[qs_color]}'>"
                 f"<div style='font-size: 14px; font-weight: bold;'>OVERALL QUALITY SCORE</div>"
                 f"<div style='font-size: 24px; font-weight: 900;'>{val_qs:.1f} / 10</div>"
                 f"<div style='font-size: 12px; opacity: 0.9;'>Verdict: {qs_msg}</div>"
@@ -942,8 +1152,7 @@ elif selected_tab == nav_options[2]:
             setting = row.get('visual_grounding.setting', 'Unknown')
             st.markdown(f"**👁️ Visual Setting:** {setting} — {', '.join(entities) if isinstance(entities, list) else entities}")
             
-            flag_cols = [c for c in df.columns if 'risk_assessment.flags.' in c]
-            active_flags = [c.replace('risk_assessment.flags.', '').replace('_', ' ').title() for c in flag_cols if row.get(c, False)]
+            active_flags = row['_active_flags']
             if active_flags:
                 st.error(f"⚠️ **Risk Flags:** {', '.join(active_flags)}")
             else:
@@ -952,11 +1161,8 @@ elif selected_tab == nav_options[2]:
         # ==================== RAW JSON (Bottom) ====================
         st.markdown("---")
         st.subheader("📄 Raw Analysis JSON")
-        try:
-            analysis_json = json.loads(row['analysis_json']) if isinstance(row['analysis_json'], str) else {}
-            st.json(analysis_json)
-        except:
-             st.error("Invalid JSON data")
+        # Only the selected row's document is read; pending rows have none
+        st.json(load_analysis(db_mtime, row['video_id']))
     else:
         st.info("No videos found matching search.")
 
@@ -1,7 +1,8 @@
 import json
-from enum import Enum
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from enum import IntFlag
+from functools import lru_cache
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field, TypeAdapter
 
 # --- DIMENSION 1: VISUAL GROUNDING ---
 class VisualGrounding(BaseModel):
@@ -10,44 +11,48 @@ class VisualGrounding(BaseModel):
     text_on_screen: Optional[str] = Field(None, description="Quote any prominent text overlays.")
 
 # --- DIMENSION 2: TAXONOMY (The Diet) ---
-class VideoFormat(str, Enum):
-    STANDARD_LANDSCAPE = "Standard_Landscape"
-    SHORT_VERTICAL = "Short_Vertical"
-    LIVESTREAM_VOD = "Livestream_VOD"
-    UNKNOWN = "Unknown"
-
-class DurationPerceived(str, Enum):
-    MICRO = "Micro (<1 min)"
-    SHORT = "Short (1-5 min)"
-    MEDIUM = "Medium (5-20 min)"
-    LONG = "Long (20+ min)"
+VideoFormat = Literal[
+    "Standard_Landscape",
+    "Short_Vertical",
+    "Livestream_VOD",
+    "Unknown",
+]
+
+DurationPerceived = Literal[
+    "Micro (<1 min)",
+    "Short (1-5 min)",
+    "Medium (5-20 min)",
+    "Long (20+ min)",
+]
 
 class VideoMetadata(BaseModel):
     format: VideoFormat
     duration_perceived: DurationPerceived
 
-class PrimaryGenre(str, Enum):
-    GAMING_GAMEPLAY = "Gaming_Gameplay"
-    GAMING_CULTURE = "Gaming_Culture"
-    ANIMATION_STORYTIME = "Animation_Storytime"
-    ANIMATION_CONTENTFARM = "Animation_ContentFarm"
-    TOYS_UNBOXING = "Toys_Unboxing"
-    PRANKS_CHALLENGES = "Pranks_Challenges"
-    EDUCATION_STEM = "Education_STEM"
-    EDUCATION_HUMANITIES = "Education_Humanities"
-    MASCOT_HORROR = "Mascot_Horror"
-    INTERNET_CULTURE = "Internet_Culture"
-    VLOG_LIFESTYLE = "Vlog_Lifestyle"
-    MUSIC_DANCE = "Music_Dance"
-    PSEUDOSCIENCE_CONSPIRACY = "Pseudoscience_Conspiracy"
-    OTHER = "Other"
-
-class TargetDemographic(str, Enum):
-    TODDLER = "Toddler (0-4)"
-    CHILD = "Child (5-9)"
-    PRE_TEEN = "Pre-Teen (10-12)"
-    TEEN = "Teen (13+)"
-    ADULT = "Adult"
+PrimaryGenre = Literal[
+    "Gaming_Gameplay",
+    "Gaming_Culture",
+    "Animation_Storytime",
+    "Animation_ContentFarm",
+    "Toys_Unboxing",
+    "Pranks_Challenges",
+    "Education_STEM",
+    "Education_Humanities",
+    "Mascot_Horror",
+    "Internet_Culture",
+    "Vlog_Lifestyle",
+    "Music_Dance",
+    "Pseudoscience_Conspiracy",
+    "Other",
+]
+
+TargetDemographic = Literal[
+    "Toddler (0-4)",
+    "Child (5-9)",
+    "Pre-Teen (10-12)",
+    "Teen (13+)",
+    "Adult",
+]
 
 class ContentTaxonomy(BaseModel):
     primary_genre: PrimaryGenre
@@ -55,23 +60,26 @@ class ContentTaxonomy(BaseModel):
     target_demographic: TargetDemographic
 
 # --- DIMENSION 3: NARRATIVE QUALITY (The Craft) ---
-class StructuralIntegrity(str, Enum):
-    COHERENT_NARRATIVE = "Coherent_Narrative"
-    LOOSE_VLOG_STYLE = "Loose_Vlog_Style"
-    COMPILATION_CLIPS = "Compilation_Clips"
-    INCOHERENT_CHAOS = "Incoherent_Chaos"
-
-class CreativeIntent(str, Enum):
-    ARTISTIC_CREATIVE = "Artistic/Creative"
-    INFORMATIONAL = "Informational"
-    PARASOCIAL_VLOG = "Parasocial/Vlog"
-    ALGORITHMIC_SLOP = "Algorithmic/Slop"
-
-class WeirdnessVerdict(str, Enum):
-    NORMAL = "Normal"
-    CREATIVE_SURREALISM = "Creative_Surrealism"
-    DISTURBING_UNCANNY = "Disturbing_Uncanny"
-    LAZY_RANDOMNESS = "Lazy_Randomness"
+StructuralIntegrity = Literal[
+    "Coherent_Narrative",
+    "Loose_Vlog_Style",
+    "Compilation_Clips",
+    "Incoherent_Chaos",
+]
+
+CreativeIntent = Literal[
+    "Artistic/Creative",
+    "Informational",
+    "Parasocial/Vlog",
+    "Algorithmic/Slop",
+]
+
+WeirdnessVerdict = Literal[
+    "Normal",
+    "Creative_Surrealism",
+    "Disturbing_Uncanny",
+    "Lazy_Randomness",
+]
 
 class NarrativeQuality(BaseModel):
     structural_integrity: StructuralIntegrity = Field(description="'Coherent' has a clear start/end. 'Incoherent' is random noise.")
@@ -79,17 +87,19 @@ class NarrativeQuality(BaseModel):
     weirdness_verdict: WeirdnessVerdict = Field(description="Distinguishes high-effort weirdness (Surrealism) from low-effort noise (Lazy).")
 
 # --- DIMENSION 4: COGNITIVE NUTRITION (The Impact) ---
-class IntellectualDensity(str, Enum):
-    VOID = "Void (Mindless)"
-    LOW = "Low (Trivia)"
-    MEDIUM = "Medium (Story/Hobby)"
-    HIGH = "High (Educational)"
-
-class EmotionalVolatility(str, Enum):
-    CALM = "Calm"
-    UPBEAT = "Upbeat"
-    HIGH_STRESS = "High_Stress"
-    AGGRESSIVE_SCREAMING = "Aggressive_Screaming"
+IntellectualDensity = Literal[
+    "Void (Mindless)",
+    "Low (Trivia)",
+    "Medium (Story/Hobby)",
+    "High (Educational)",
+]
+
+EmotionalVolatility = Literal[
+    "Calm",
+    "Upbeat",
+    "High_Stress",
+    "Aggressive_Screaming",
+]
 
 class CognitiveNutrition(BaseModel):
     intellectual_density: IntellectualDensity
@@ -108,17 +118,32 @@ class RiskFlags(BaseModel):
     sexual_themes: bool
     mascot_horror: bool = Field(description="Huggy Wuggy, etc.")
 
+class RiskFlag(IntFlag):
+    """One bit per RiskFlags field, in field order; videos.risk_flags packs them into one integer."""
+    IDEOLOGICAL_RADICALIZATION = 1 << 0
+    PSEUDOSCIENCE_MISINFO = 1 << 1
+    BODY_IMAGE_HARM = 1 << 2
+    DANGEROUS_BEHAVIOR = 1 << 3
+    COMMERCIAL_EXPLOITATION = 1 << 4
+    LOOTBOX_GAMBLING = 1 << 5
+    SEXUAL_THEMES = 1 << 6
+    MASCOT_HORROR = 1 << 7
+
 class RiskAssessment(BaseModel):
     safety_score: int = Field(description="0-100 score.")
     flags: RiskFlags
 
 # --- SUMMARY & VERDICT ---
-class ActionVerdict(str, Enum):
-    APPROVE = "Approve"
-    MONITOR = "Monitor"
-    BLOCK_VIDEO = "Block_Video"
-    BLOCK_CHANNEL = "Block_Channel"
-
+ActionVerdict = Literal[
+    "Approve",
+    "Monitor",
+    "Block_Video",
+    "Block_Channel",
+]
+
+# If actions ever carry their own fields (e.g. a Block_Channel expiry), split
+# this into one model per action with `action: Literal[...]` and make Verdict a
+# discriminated union on "action" (Field(discriminator="action")), not a plain Union
 class Verdict(BaseModel):
     action: ActionVerdict
     reason: str
@@ -133,5 +158,28 @@ class VideoAnalysis(BaseModel):
     summary: str = Field(description="Cynical summary of intent.")
     verdict: Verdict
 
+def _strip_titles(node):
+    """Drops the auto-generated "title" strings from a JSON schema, recursively."""
+    if isinstance(node, dict):
+        return {k: _strip_titles(v) for k, v in node.items() if not (k == "title" and isinstance(v, str))}
+    if isinstance(node, list):
+        return [_strip_titles(v) for v in node]
+    return node
+
+@lru_cache(maxsize=1)
 def get_schema_json():
-    return json.dumps(VideoAnalysis.model_json_schema(), indent=2)
+    """
+    VideoAnalysis' JSON schema as sent to Gemini. Pydantic titles every model
+    and field ("Safety Score" for safety_score); they only repeat the names, so
+    they are dropped to save request tokens. Descriptions are prompt text and stay.
+    Fixed for the life of the process; cache keys call this per request.
+    """
+    return json.dumps(_strip_titles(VideoAnalysis.model_json_schema()), indent=2)
+
+def get_response_schema():
+    # A fresh dict per call: google-genai rewrites the schema it is given in place
+    return json.loads(get_schema_json())
+
+# Validator for raw Gemini JSON, built once and reused for every response
+VIDEO_ANALYSIS_ADAPTER = TypeAdapter(VideoAnalysis)
+parse_analysis = VIDEO_ANALYSIS_ADAPTER.validate_json
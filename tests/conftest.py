@@ -1,78 +1,104 @@
 import pytest
-import os
-from unittest.mock import MagicMock
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
 from sqlite_utils import Database
+from src.ingest import tune_connection
 from src.schema import VideoAnalysis
 
+# Sample JSON that strictly follows our schema
+_SAMPLE_ANALYSIS = {
+    "visual_grounding": {
+        "detected_entities": ["Teacher", "Whiteboard", "Robot Kit"],
+        "setting": "Classroom",
+        "text_on_screen": "Robotics 101"
+    },
+    "summary": "This is a mocked summary of a safe video.",
+    "video_metadata": {
+        "format": "Standard_Landscape",
+        "duration_perceived": "Medium (5-20 min)"
+    },
+    "content_taxonomy": {
+        "primary_genre": "Education_STEM",
+        "specific_topic": "Robotics",
+        "target_demographic": "Child (5-9)"
+    },
+    "narrative_quality": {
+        "structural_integrity": "Coherent_Narrative",
+        "creative_intent": "Informational",
+        "weirdness_verdict": "Normal"
+    },
+    "risk_assessment": {
+        "safety_score": 95,
+        "flags": {
+            "ideological_radicalization": False,
+            "pseudoscience_misinfo": False,
+            "body_image_harm": False,
+            "dangerous_behavior": False,
+            "commercial_exploitation": False,
+            "lootbox_gambling": False,
+            "sexual_themes": False,
+            "mascot_horror": False
+        }
+    },
+    "cognitive_nutrition": {
+        "intellectual_density": "High (Educational)",
+        "emotional_volatility": "Calm",
+        "is_brainrot": False,
+        "is_slop": False
+    },
+    "verdict": {
+        "action": "Approve",
+        "reason": "Safe educational content."
+    }
+}
+
+# Already in the exact shape the model dumps, so it is serialized directly
+# (once, not per fixture use) and checked against the schema at collection
+_SAMPLE_JSON = json.dumps(_SAMPLE_ANALYSIS)
+if __debug__:
+    VideoAnalysis.model_validate_json(_SAMPLE_JSON)
+
+class _Usage:
+    """Stand-in for the SDK's usage_metadata: just the two token counts analyze.py reads."""
+    __slots__ = ("prompt_token_count", "candidates_token_count")
+
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+@pytest.fixture(autouse=True)
+def isolated_response_cache(tmp_path, monkeypatch):
+    """Keeps the on-disk Gemini response cache out of the working tree."""
+    monkeypatch.setattr("src.analyze.RESPONSE_CACHE_DIR", tmp_path / "response_cache")
+
 @pytest.fixture
 def mock_gemini_response(monkeypatch):
     """Mocks the Gemini API response."""
     mock_client = MagicMock()
-    mock_response = MagicMock()
-    
-    # Sample JSON that strictly follows our schema
-    sample_analysis = {
-        "visual_grounding": {
-            "detected_entities": ["Teacher", "Whiteboard", "Robot Kit"],
-            "setting": "Classroom",
-            "text_on_screen": "Robotics 101"
-        },
-        "summary": "This is a mocked summary of a safe video.",
-        "video_metadata": {
-            "format": "Standard_Landscape",
-            "duration_perceived": "Medium (5-20 min)"
-        },
-        "content_taxonomy": {
-            "primary_genre": "Education_STEM",
-            "specific_topic": "Robotics",
-            "target_demographic": "Child (5-9)"
-        },
-        "narrative_quality": {
-            "structural_integrity": "Coherent_Narrative",
-            "creative_intent": "Informational",
-            "weirdness_verdict": "Normal"
-        },
-        "risk_assessment": {
-            "safety_score": 95,
-            "flags": {
-                "ideological_radicalization": False,
-                "pseudoscience_misinfo": False,
-                "body_image_harm": False,
-                "dangerous_behavior": False,
-                "commercial_exploitation": False,
-                "lootbox_gambling": False,
-                "sexual_themes": False,
-                "mascot_horror": False
-            }
-        },
-        "cognitive_nutrition": {
-            "intellectual_density": "High (Educational)",
-            "emotional_volatility": "Calm",
-            "is_brainrot": False,
-            "is_slop": False
-        },
-        "verdict": {
-            "action": "Approve",
-            "reason": "Safe educational content."
-        }
-    }
-    
-    mock_response.text = VideoAnalysis(**sample_analysis).model_dump_json()
-    mock_response.usage_metadata.prompt_token_count = 100
-    mock_response.usage_metadata.candidates_token_count = 50
+    # Plain objects rather than MagicMocks: only these attributes exist, so a
+    # typo in analyze.py fails instead of reading an auto-created child mock
+    mock_response = SimpleNamespace(text=_SAMPLE_JSON, usage_metadata=_Usage(100, 50))
     
     mock_client.models.generate_content.return_value = mock_response
+    mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
     
     # Mocking the client initialization (bit harder in analyze.py main loop likely via dependency injection or simple monkeypatch of genai.Client)
     # For unit testing specific functions, we pass the mock.
     
     return mock_client
 
+@pytest.fixture
+def sample_analysis():
+    """A fresh copy of the sample analysis dict, safe to modify."""
+    return json.loads(_SAMPLE_JSON)
+
 @pytest.fixture
 def temp_db(tmp_path):
     """Creates a temporary SQLite database."""
     db_path = tmp_path / "test.db"
-    db = Database(db_path)
+    # Same WAL/synchronous=NORMAL setup as the real DB, so seeding rows doesn't fsync per insert
+    db = tune_connection(Database(db_path))
     # Create tables
     db["videos"].create({
         "video_id": str,
@@ -89,6 +115,8 @@ def temp_db(tmp_path):
         "analysis_json": str,
          "model_used": str,
          "input_tokens": int,
-         "output_tokens": int
+         "output_tokens": int,
+         "estimated_cost": float,
+         "error_log": str
     }, pk="video_id")
     return db
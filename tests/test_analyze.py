@@ -1,6 +1,17 @@
-from src.analyze import analyze_video
-from src.schema import VideoAnalysis
+import asyncio
 import json
+import queue
+import sys
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from google.genai import errors
+import src.analyze as analyze
+from src.analyze import (
+    ID_CHUNK_SIZE, WRITE_BATCH_SIZE, _STOP_WRITER,
+    analyze_video, analyze_video_async, apply_updates, construct_prompt, query_ids,
+)
 
 def test_analyze_video_mock(mock_gemini_response):
     """Test the analysis logic with a mocked Gemini client."""
@@ -29,3 +40,230 @@ def test_analyze_integration_mock(temp_db, mock_gemini_response, monkeypatch):
     # 2. Run logic (replicating analyze.py loop)
     # We can invoke main() but we need to monkeypatch get_db and genai.Client
     pass # Avoiding full integration test in this simple setup, sticking to unit for now.
+
+def test_analyze_video_uses_response_cache(mock_gemini_response):
+    """A repeated (model, prompt) pair is served from disk instead of the API."""
+    
+    first = analyze_video(mock_gemini_response, "vid_cached", "Cached Video")
+    second = analyze_video(mock_gemini_response, "vid_cached", "Cached Video")
+    
+    assert mock_gemini_response.models.generate_content.call_count == 1
+    assert second.text == first.text
+    assert second.usage_metadata.prompt_token_count == 100
+
+def test_analyze_video_requeries_malformed_responses(mock_gemini_response):
+    """Replies that aren't valid JSON are never cached, nor served from a stale entry."""
+    
+    ok = mock_gemini_response.models.generate_content.return_value
+    bad = SimpleNamespace(text='{"verdict": ', usage_metadata=ok.usage_metadata)
+    mock_gemini_response.models.generate_content.return_value = bad
+    
+    assert analyze_video(mock_gemini_response, "vid_bad_json", "Bad JSON").text == bad.text
+    assert not analyze.RESPONSE_CACHE_DIR.exists()
+    
+    # An entry left behind with malformed text is treated as a miss
+    analyze.RESPONSE_CACHE_DIR.mkdir(parents=True)
+    prompt = analyze.construct_prompt("Bad JSON", "vid_bad_json")
+    cache_file = analyze._cache_file(analyze.CURRENT_MODEL, prompt, analyze.SYSTEM_INSTRUCTION_V1, analyze.get_response_schema())
+    cache_file.write_text(json.dumps({"text": bad.text, "usage_metadata": {"prompt_token_count": 1, "candidates_token_count": 1}}))
+    
+    mock_gemini_response.models.generate_content.return_value = ok
+    assert analyze_video(mock_gemini_response, "vid_bad_json", "Bad JSON") is ok
+    assert mock_gemini_response.models.generate_content.call_count == 2
+    assert json.loads(cache_file.read_text())["text"] == ok.text
+
+def test_analyze_video_retries_transient_errors(mock_gemini_response, monkeypatch):
+    """429/5xx responses are retried; other API errors fail immediately."""
+    monkeypatch.setattr("src.analyze.time.sleep", lambda s: None)
+    
+    ok = mock_gemini_response.models.generate_content.return_value
+    mock_gemini_response.models.generate_content.side_effect = [
+        errors.ClientError(429, {"error": {"message": "Resource exhausted"}}),
+        errors.ServerError(503, {"error": {"message": "Unavailable"}}),
+        ok,
+    ]
+    response = analyze_video(mock_gemini_response, "vid_retry", "Retry Video")
+    assert response is ok
+    assert mock_gemini_response.models.generate_content.call_count == 3
+    
+    mock_gemini_response.models.generate_content.side_effect = errors.ClientError(400, {"error": {"message": "Bad request"}})
+    assert analyze_video(mock_gemini_response, "vid_bad", "Bad Video") is None
+    assert mock_gemini_response.models.generate_content.call_count == 4
+
+def test_analyze_video_async_overlaps_requests(mock_gemini_response):
+    """A gathered batch of videos is in flight on the event loop at the same time."""
+    ok = mock_gemini_response.aio.models.generate_content.return_value
+    in_flight = peak = 0
+    
+    async def slow_generate(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return ok
+    
+    mock_gemini_response.aio.models.generate_content.side_effect = slow_generate
+    
+    async def analyze_batch():
+        return await asyncio.gather(*(analyze_video_async(mock_gemini_response, f"vid_{i}", f"Video {i}") for i in range(8)))
+    
+    responses = asyncio.run(analyze_batch())
+    assert all(json.loads(r.text)["verdict"]["action"] == "Approve" for r in responses)
+    assert mock_gemini_response.aio.models.generate_content.await_count == 8
+    assert peak == 8
+
+def _db_file(db):
+    return db.conn.execute("PRAGMA database_list").fetchone()[2]
+
+def _run_main(monkeypatch, temp_db, client, *argv):
+    """Runs analyze.main() against temp_db with `client` standing in for Gemini."""
+    monkeypatch.delenv("MOCK_GEMINI", raising=False)
+    monkeypatch.setattr(analyze, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(analyze, "DB_FILE", _db_file(temp_db))
+    monkeypatch.setattr(analyze, "make_client", lambda api_key, max_workers: client)
+    monkeypatch.setattr(sys, "argv", ["analyze.py", *argv])
+    analyze.main()
+
+def test_main_force_bypasses_response_cache(temp_db, mock_gemini_response, monkeypatch):
+    """--ids X --force queries Gemini again even though X's reply is cached."""
+    temp_db["videos"].insert({"video_id": "vid_1", "title": "Educational Content", "status": "ANALYZED", "safety_score": 10})
+    analyze_video(mock_gemini_response, "vid_1", "Educational Content")
+    
+    _run_main(monkeypatch, temp_db, mock_gemini_response, "--ids", "vid_1", "--force")
+    
+    assert mock_gemini_response.aio.models.generate_content.await_count == 1
+    assert temp_db["videos"].get("vid_1")["safety_score"] == 95
+
+def test_main_ids_skips_analyzed_rows(temp_db, mock_gemini_response, monkeypatch):
+    """Without --force, --ids only analyzes rows that aren't ANALYZED yet."""
+    temp_db["videos"].insert_all([
+        {"video_id": "done", "title": "Already Done", "status": "ANALYZED", "safety_score": 10},
+        {"video_id": "todo", "title": "Still Pending", "status": "PENDING"},
+    ], pk="video_id")
+    
+    _run_main(monkeypatch, temp_db, mock_gemini_response, "--ids", "done", "todo")
+    
+    calls = mock_gemini_response.aio.models.generate_content.await_args_list
+    assert [c.kwargs["contents"] for c in calls] == [construct_prompt("Still Pending", "todo")]
+    assert temp_db["videos"].get("done")["safety_score"] == 10
+    assert temp_db["videos"].get("todo")["status"] == "ANALYZED"
+
+def test_main_flushes_queued_results_when_interrupted(temp_db, mock_gemini_response, monkeypatch):
+    """Results queued before a worker blows up (e.g. Ctrl-C) still reach the DB."""
+    temp_db["videos"].insert_all([
+        {"video_id": "first", "title": "First", "status": "PENDING"},
+        {"video_id": "second", "title": "Second", "status": "PENDING"},
+    ], pk="video_id")
+    # Long enough that only the stop sentinel can end the writer's first batch
+    monkeypatch.setattr(analyze, "WRITE_BATCH_TIMEOUT", 30)
+    real_analyze = analyze.analyze_video_async
+    
+    async def interrupted(client, video_id, title, **kwargs):
+        if video_id == "second":
+            raise KeyboardInterrupt
+        return await real_analyze(client, video_id, title, **kwargs)
+    
+    monkeypatch.setattr(analyze, "analyze_video_async", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        _run_main(monkeypatch, temp_db, mock_gemini_response, "--ids", "first", "second", "--workers", "1")
+    
+    statuses = {r["video_id"]: r["status"] for r in temp_db.query("SELECT video_id, status FROM videos")}
+    assert statuses == {"first": "ANALYZED", "second": "PENDING"}
+
+def _start_writer(monkeypatch, temp_db, batch_timeout):
+    """Starts write_results on temp_db, recording the size of every batch it applies."""
+    monkeypatch.setattr(analyze, "DB_FILE", _db_file(temp_db))
+    monkeypatch.setattr(analyze, "WRITE_BATCH_TIMEOUT", batch_timeout)
+    sizes = []
+    
+    def recording_apply(db, batch):
+        sizes.append(len(batch))
+        apply_updates(db, batch)
+    
+    monkeypatch.setattr(analyze, "apply_updates", recording_apply)
+    results_q = queue.Queue()
+    writer = threading.Thread(target=analyze.write_results, args=(results_q,), daemon=True)
+    writer.start()
+    return results_q, writer, sizes
+
+def test_write_results_batches_by_size_and_flushes_on_stop(temp_db, monkeypatch):
+    """Full batches are cut at WRITE_BATCH_SIZE; the sentinel flushes the partial tail at once."""
+    temp_db["videos"].insert_all([{"video_id": f"v{i}", "status": "PENDING"} for i in range(120)], pk="video_id")
+    results_q, writer, sizes = _start_writer(monkeypatch, temp_db, batch_timeout=30)
+    
+    for i in range(120):
+        results_q.put((f"v{i}", {"status": "ANALYZED", "safety_score": i}))
+    results_q.put(_STOP_WRITER)
+    writer.join(timeout=5)
+    
+    assert not writer.is_alive()
+    assert sizes == [WRITE_BATCH_SIZE, WRITE_BATCH_SIZE, 120 - 2 * WRITE_BATCH_SIZE]
+    assert [r["safety_score"] for r in temp_db.query("SELECT safety_score FROM videos ORDER BY safety_score")] == list(range(120))
+
+def test_write_results_cuts_batch_on_timeout(temp_db, monkeypatch):
+    """A batch is committed once WRITE_BATCH_TIMEOUT passes, without waiting to fill up."""
+    temp_db["videos"].insert_all([{"video_id": f"v{i}", "status": "PENDING"} for i in range(5)], pk="video_id")
+    results_q, writer, sizes = _start_writer(monkeypatch, temp_db, batch_timeout=0.05)
+    
+    for i in range(3):
+        results_q.put((f"v{i}", {"status": "ANALYZED"}))
+    time.sleep(0.5)
+    assert sizes == [3]
+    
+    for i in range(3, 5):
+        results_q.put((f"v{i}", {"status": "ANALYZED"}))
+    results_q.put(_STOP_WRITER)
+    writer.join(timeout=5)
+    assert sizes == [3, 2]
+    assert temp_db["videos"].count_where("status = 'ANALYZED'") == 5
+
+def test_write_results_falls_back_to_single_rows(temp_db, monkeypatch):
+    """A row that fails to write doesn't take the rest of its batch down with it."""
+    temp_db["videos"].insert_all([{"video_id": f"v{i}", "status": "PENDING"} for i in range(3)], pk="video_id")
+    results_q, writer, sizes = _start_writer(monkeypatch, temp_db, batch_timeout=30)
+    
+    results_q.put(("v0", {"status": "ANALYZED"}))
+    results_q.put(("v1", {"no_such_column": 1}))
+    results_q.put(("v2", {"status": "ERROR", "error_log": "No response from Gemini"}))
+    results_q.put(_STOP_WRITER)
+    writer.join(timeout=5)
+    
+    assert sizes == [3, 1, 1, 1]
+    statuses = {r["video_id"]: r["status"] for r in temp_db.query("SELECT video_id, status FROM videos")}
+    assert statuses == {"v0": "ANALYZED", "v1": "PENDING", "v2": "ERROR"}
+
+def test_apply_updates_groups_mixed_column_sets(temp_db):
+    """Rows with different column sets each get exactly their own columns written."""
+    temp_db["videos"].insert_all([{"video_id": f"v{i}", "status": "PENDING", "safety_score": 50} for i in range(4)], pk="video_id")
+    
+    apply_updates(temp_db, [
+        ("v0", {"status": "ANALYZED", "safety_score": 90}),
+        ("v1", {"status": "ERROR", "error_log": "boom"}),
+        ("v2", {"status": "ANALYZED", "safety_score": 10}),
+        ("v3", {"error_log": "note", "status": "ERROR"}),
+    ])
+    
+    rows = {r["video_id"]: (r["status"], r["safety_score"], r["error_log"]) for r in temp_db.query("SELECT * FROM videos")}
+    assert rows == {
+        "v0": ("ANALYZED", 90, None),
+        "v1": ("ERROR", 50, "boom"),
+        "v2": ("ANALYZED", 10, None),
+        "v3": ("ERROR", 50, "note"),
+    }
+
+def test_query_ids_chunks_large_id_lists(temp_db):
+    """More than ID_CHUNK_SIZE ids are split over several IN (...) queries, with `where` applied to each."""
+    
+    n = ID_CHUNK_SIZE + 250
+    temp_db["videos"].insert_all([
+        {"video_id": f"v{i:04d}", "status": "ANALYZED" if i % 3 == 0 else "PENDING"} for i in range(n)
+    ], pk="video_id")
+    video_ids = [f"v{i:04d}" for i in range(n)] + ["missing"]
+    
+    rows = list(query_ids(temp_db, "SELECT video_id, status FROM videos", video_ids, "status != 'ANALYZED'"))
+    assert sorted(r["video_id"] for r in rows) == [f"v{i:04d}" for i in range(n) if i % 3]
+    assert all(r["status"] == "PENDING" for r in rows)
+    
+    counts = [r["n"] for r in query_ids(temp_db, "SELECT count(*) AS n FROM videos", video_ids)]
+    assert counts == [ID_CHUNK_SIZE, n - ID_CHUNK_SIZE]
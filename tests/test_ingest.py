@@ -0,0 +1,137 @@
+import json
+import logging
+import pytest
+from src.ingest import READ_CHUNK_SIZE, extract_video_id, init_db, iter_history, process_history
+from src.schema import RiskFlag
+
+def test_iter_history_streams_entries_across_chunk_boundaries(tmp_path):
+    """Entries split over several reads are decoded intact and in order."""
+    
+    entries = [
+        {"header": "YouTube", "title": f"Watched Video {i} [ünïcode, \"quoted\"]", "titleUrl": f"https://www.youtube.com/watch?v=id{i}"}
+        for i in range(25)
+    ]
+    path = tmp_path / "watch-history.json"
+    path.write_text(json.dumps(entries, indent=2), encoding="utf-8")
+    
+    assert list(iter_history(path, chunk_size=7)) == entries
+    assert list(iter_history(path)) == entries
+
+def test_iter_history_scalars_across_chunk_boundaries(tmp_path):
+    """Numbers and literals split by a tiny read size are not cut short."""
+    entries = [123, -4.5e10, 2.5, True, None, "text", {"a": [1, 2]}, 1234567]
+    path = tmp_path / "watch-history.json"
+    path.write_text(json.dumps(entries))
+    
+    for chunk_size in (1, 2, 3, 5):
+        assert list(iter_history(path, chunk_size=chunk_size)) == entries
+    
+    path.write_text("[12")
+    with pytest.raises(ValueError):
+        list(iter_history(path, chunk_size=2))
+
+def test_iter_history_empty_array(tmp_path):
+    path = tmp_path / "watch-history.json"
+    path.write_text(" [ ] ")
+    
+    assert list(iter_history(path, chunk_size=1)) == []
+
+def test_iter_history_rejects_truncated_input(tmp_path):
+    """A file cut off anywhere before the closing ']' raises instead of ending early."""
+    text = json.dumps([{"header": "YouTube", "title": "Watched A", "n": 1.5, "ok": True}, {"header": "YouTube"}])
+    path = tmp_path / "watch-history.json"
+    
+    for end in range(1, len(text)):
+        path.write_text(text[:end])
+        for chunk_size in (3, READ_CHUNK_SIZE):
+            with pytest.raises(ValueError):
+                list(iter_history(path, chunk_size=chunk_size))
+
+def test_iter_history_requires_single_commas(tmp_path):
+    """Entries must be separated by exactly one ',' at any chunk boundary."""
+    path = tmp_path / "watch-history.json"
+    for text in ('[{"a": 1} {"b": 2}]', '[,{"a": 1}]', '[{"a": 1},,{"b": 2}]', '[{"a": 1},]', '[{"a": 1}, x]'):
+        path.write_text(text)
+        for chunk_size in (1, 4, READ_CHUNK_SIZE):
+            with pytest.raises(ValueError):
+                list(iter_history(path, chunk_size=chunk_size))
+    
+    path.write_text('[{"a": 1} ,\n{"b": 2}\n]')
+    assert list(iter_history(path, chunk_size=1)) == [{"a": 1}, {"b": 2}]
+
+def test_process_history_counts_duplicates(tmp_path, monkeypatch, caplog):
+    """Repeated video_ids are inserted once (first watch wins) and reported as duplicates."""
+    history = tmp_path / "watch-history.json"
+    monkeypatch.setattr("src.ingest.HISTORY_FILE", history)
+    monkeypatch.setattr("src.ingest.DB_FILE", tmp_path / "test.db")
+    
+    history.write_text(json.dumps([
+        {"header": "YouTube", "title": "Watched First", "titleUrl": "https://www.youtube.com/watch?v=aaa"},
+        {"header": "YouTube", "title": "Watched Second", "titleUrl": "https://www.youtube.com/watch?v=bbb"},
+        {"header": "YouTube", "title": "Watched First Again", "titleUrl": "https://www.youtube.com/watch?v=aaa&t=5s"},
+        {"header": "YouTube Music", "title": "Watched Song"},
+        {"header": "YouTube", "title": "Watched Third", "titleUrl": "https://www.youtube.com/watch?v=ccc"},
+        {"header": "YouTube", "title": "Watched Second Again", "titleUrl": "https://www.youtube.com/watch?v=bbb"},
+    ]))
+    
+    with caplog.at_level(logging.INFO):
+        process_history()
+    assert "Skipped (Invalid/No ID): 1" in caplog.messages
+    assert "Duplicates (Already in DB or repeated in JSON): 2" in caplog.messages
+    assert "New Videos Added: 3" in caplog.messages
+    db = init_db()
+    assert {r["video_id"]: r["title"] for r in db.query("SELECT video_id, title FROM videos")} == {"aaa": "First", "bbb": "Second", "ccc": "Third"}
+    
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        process_history()
+    assert "Duplicates (Already in DB or repeated in JSON): 5" in caplog.messages
+    assert "New Videos Added: 0" in caplog.messages
+
+def test_process_history_inserts_rest_of_failed_batch(tmp_path, monkeypatch, caplog):
+    """A record the DB rejects is reported as a failure; the rest of its batch is still inserted."""
+    history = tmp_path / "watch-history.json"
+    monkeypatch.setattr("src.ingest.HISTORY_FILE", history)
+    monkeypatch.setattr("src.ingest.DB_FILE", tmp_path / "test.db")
+    db = init_db()
+    db.conn.execute(
+        "CREATE TRIGGER reject_bad BEFORE INSERT ON videos WHEN NEW.video_id = 'bad'"
+        " BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+    )
+    
+    history.write_text(json.dumps([
+        {"header": "YouTube", "title": f"Watched {video_id}", "titleUrl": f"https://www.youtube.com/watch?v={video_id}"}
+        for video_id in ("aaa", "bad", "bbb", "aaa")
+    ]))
+    
+    with caplog.at_level(logging.INFO):
+        process_history()
+    assert "New Videos Added: 2" in caplog.messages
+    assert "Duplicates (Already in DB or repeated in JSON): 1" in caplog.messages
+    assert "Failed to Insert: 1" in caplog.messages
+    assert sorted(r["video_id"] for r in db.query("SELECT video_id FROM videos")) == ["aaa", "bbb"]
+
+def test_extract_video_id_strips_trailing_params():
+    """Only the id itself is kept, whatever query params follow it."""
+    
+    assert extract_video_id("https://www.youtube.com/watch?v=abc123") == "abc123"
+    assert extract_video_id("https://www.youtube.com/watch?v=abc123&t=1s") == "abc123"
+    assert extract_video_id("https://www.youtube.com/watch?feature=share&v=abc123&list=x") == "abc123"
+    assert extract_video_id("https://www.youtube.com/channel/UC123") is None
+    assert extract_video_id("https://www.youtube.com/watch?v=") is None
+
+def test_risk_flags_column_packs_flag_bits(tmp_path, monkeypatch):
+    """risk_flags exposes the analysis' flag booleans as RiskFlag bits."""
+    monkeypatch.setattr("src.ingest.DB_FILE", tmp_path / "test.db")
+    db = init_db()
+    
+    flags = {flag.name.lower(): False for flag in RiskFlag}
+    flags.update(body_image_harm=True, mascot_horror=True)
+    db["videos"].insert_all([
+        {"video_id": "flagged", "status": "ANALYZED", "analysis_json": json.dumps({"risk_assessment": {"flags": flags}})},
+        {"video_id": "pending", "status": "PENDING"},
+    ])
+    
+    packed = {row["video_id"]: row["risk_flags"] for row in db.query("SELECT video_id, risk_flags FROM videos")}
+    assert packed == {"flagged": RiskFlag.BODY_IMAGE_HARM | RiskFlag.MASCOT_HORROR, "pending": None}
+    assert [row["video_id"] for row in db.query("SELECT video_id FROM videos WHERE risk_flags & ?", [RiskFlag.MASCOT_HORROR])] == ["flagged"]
@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+import pytest
+from streamlit.testing.v1 import AppTest
+from src.ingest import init_db
+
+REPORT_SCRIPT = Path(__file__).resolve().parent.parent / "src" / "report.py"
+
+@pytest.fixture
+def report_db(tmp_path, monkeypatch):
+    """
+    Runs the dashboard from a scratch directory, so it reads tmp_path's
+    data/slopstopper.db and keeps Streamlit's disk cache under tmp_path.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr("src.ingest.DB_FILE", tmp_path / "data" / "slopstopper.db")
+    (tmp_path / "data").mkdir()
+    return init_db()
+
+def _insert_analyzed(db, video_id, analysis):
+    db["videos"].insert({
+        "video_id": video_id,
+        "title": f"Video {video_id}",
+        "video_url": f"https://www.youtube.com/watch?v={video_id}",
+        "channel_name": "Channel",
+        "watch_timestamp": "2025-03-01T12:00:00",
+        "status": "ANALYZED",
+        "analysis_json": json.dumps(analysis),
+        "safety_score": analysis["risk_assessment"]["safety_score"],
+    })
+
+def test_audit_renders_rows_missing_fingerprint_fields(report_db, sample_analysis):
+    """A partial analysis (no narrative_quality) gets 'Unknown' badges instead of crashing the Audit tab."""
+    _insert_analyzed(report_db, "full", sample_analysis)
+    del sample_analysis["narrative_quality"]
+    sample_analysis["cognitive_nutrition"]["is_brainrot"] = True
+    _insert_analyzed(report_db, "partial", sample_analysis)
+
+    at = AppTest.from_file(str(REPORT_SCRIPT), default_timeout=60).run()
+    assert not at.exception
+    at.radio(key="nav_selection").set_value(at.radio(key="nav_selection").options[1]).run()
+
+    assert not at.exception
+    assert any("Video partial" in e.label for e in at.expander)